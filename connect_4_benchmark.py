@@ -0,0 +1,485 @@
+#! /usr/bin/connect_4_benchmark.py
+
+"""
+Benchmark of Connect 4 agent modules on a fixed corpus of positions.
+
+For every position of the corpus (openings, midgames, tactical positions and
+near-full boards on several board sizes) each agent is asked for a move. No
+position can be answered by the agents' rules (an immediate win or block, the
+center column, a double threat, a single safe column), so every move measures
+a search. Positions an agent that reports its searches still answers without
+one (say, with a rule newer than the corpus) are counted and left out of its
+latencies and nodes per second, so agents with different rules can still be
+compared. The
+report gives the p50/p95/p99 latency of what_is_your_move, nodes searched per
+second when the agent reports them, peak memory, how often the move matches
+the reference answer, and the time per call of heuristic, a_star and
+forward_chaining_reasoning. Results are saved as JSON so that two commits can
+be compared side by side.
+
+    python connect_4_benchmark.py Team1_Connect_4_Agent Team2_Connect_4_Agent --output new.json
+    python connect_4_benchmark.py --compare old.json new.json
+    python connect_4_benchmark.py --build-corpus benchmarks/positions_v2.json
+"""
+
+# IMPORTS
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+
+from connect_4_tournament import check_win, configure_agent, drop_piece, load_agent, other, quiet
+
+# Corpus used unless --corpus says otherwise. Bump the version in the file name
+# whenever the positions change, so old results are not compared with new ones.
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'benchmarks', 'positions_v2.json')
+
+# Board sizes and number of positions of each category in a generated corpus
+CORPUS_SIZES = ((6, 7), (7, 8), (9, 10))
+CORPUS_COUNTS = {'opening': 4, 'midgame': 4, 'tactical': 6, 'near_full': 4}
+# Chance that a corpus game plays the center column whenever it can, so that positions
+# with the center column full, which the center rule leaves to the search, are common
+CENTER_BIAS = 0.5
+# Own moves within which a tactical position is won by force
+TACTICAL_MOVES = 3
+# Agents a generated position is tried on; positions any of them answers without a
+# search are left out
+CORPUS_CHECK_AGENTS = ('Team1_Connect_4_Agent', 'Team2_Connect_4_Agent')
+# Settings of the agents while benchmarking: no opening book, which answers openings
+# without a search
+BENCHMARK_SETTINGS = {'OPENING_BOOK': False}
+
+
+# HELPER FUNCTIONS
+def open_columns(board):
+    return [col for col in range(len(board[0])) if board[0][col] == ' ']
+
+
+def connects(board, row, col, symbol):
+    """Checks whether the piece of symbol at (row, col) is part of four in a row."""
+    rows, cols = len(board), len(board[0])
+    for d_row, d_col in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+        count = 1
+        for sign in (1, -1):
+            r, c = row + sign * d_row, col + sign * d_col
+            while 0 <= r < rows and 0 <= c < cols and board[r][c] == symbol:
+                count += 1
+                r, c = r + sign * d_row, c + sign * d_col
+        if count >= 4:
+            return True
+    return False
+
+
+def winning_columns(board, symbol):
+    """0-based columns where symbol would win at once."""
+    columns = []
+    for col in open_columns(board):
+        row = drop_piece(board, col, symbol)
+        if connects(board, row, col, symbol):
+            columns.append(col)
+        board[row][col] = ' '
+    return columns
+
+
+def solve(board, symbol, memo):
+    """Exact result of a small position for symbol to move: 1 win, 0 draw, -1 loss."""
+    key = (''.join(''.join(row) for row in board), symbol)
+    if key not in memo:
+        columns = open_columns(board)
+        best = 0 if not columns else -1
+        for col in columns:
+            row = drop_piece(board, col, symbol)
+            if connects(board, row, col, symbol):
+                value = 1
+            else:
+                value = -solve(board, other(symbol), memo)
+            board[row][col] = ' '
+            best = max(best, value)
+            if best == 1:
+                break
+        memo[key] = best
+    return memo[key]
+
+
+def wins_by_force(board, symbol, col, moves, memo):
+    """Whether playing col wins for symbol by force within moves moves of its own (this
+    one included), whatever the opponent replies."""
+    row = drop_piece(board, col, symbol)
+    if connects(board, row, col, symbol):
+        won = True
+    elif moves == 1:
+        won = False
+    else:
+        key = (''.join(''.join(cells) for cells in board), symbol, moves)
+        if key not in memo:
+            memo[key] = replies_lose(board, other(symbol), moves - 1, memo)
+        won = memo[key]
+    board[row][col] = ' '
+    return won
+
+
+def replies_lose(board, symbol, moves, memo):
+    """Whether every move of symbol leaves the opponent a win by force within moves moves."""
+    replies = open_columns(board)
+    for reply in replies:
+        row = drop_piece(board, reply, symbol)
+        lost = not connects(board, row, reply, symbol) and any(
+            wins_by_force(board, other(symbol), col, moves, memo) for col in open_columns(board))
+        board[row][reply] = ' '
+        if not lost:
+            return False
+    return bool(replies)
+
+
+def forced_win_columns(board, symbol, moves):
+    """0-based columns after which symbol wins by force within moves moves of its own."""
+    memo = {}
+    return [col for col in open_columns(board) if wins_by_force(board, symbol, col, moves, memo)]
+
+
+def rule_answers(board, symbol):
+    """
+    Description: Whether one of the agents' rules answers the position without a
+    search: a win or a block at once, an open center column, a move leaving two
+    wins at once or two stacked ones (a double or stacked threat), or only one
+    column that does not let the opponent win at once.
+    """
+    cols = len(board[0])
+    if winning_columns(board, symbol) or winning_columns(board, other(symbol)):
+        return True
+    if board[0][cols // 2] == ' ':
+        return True
+    safe = 0
+    for col in open_columns(board):
+        row = drop_piece(board, col, symbol)
+        wins = winning_columns(board, symbol)
+        stacked = False
+        for win in wins:
+            win_row = drop_piece(board, win, other(symbol))
+            stacked = stacked or win in winning_columns(board, symbol)
+            board[win_row][win] = ' '
+        safe += not winning_columns(board, other(symbol))
+        board[row][col] = ' '
+        if len(wins) >= 2 or stacked:
+            return True
+    return safe <= 1
+
+
+def best_columns(board, symbol):
+    """0-based columns that keep the exact result of a small position."""
+    memo, results = {}, {}
+    for col in open_columns(board):
+        row = drop_piece(board, col, symbol)
+        results[col] = 1 if connects(board, row, col, symbol) else -solve(board, other(symbol), memo)
+        board[row][col] = ' '
+    best = max(results.values())
+    return [col for col, value in results.items() if value == best]
+
+
+"""
+Position Corpus here
+"""
+def random_position(generator, rows, cols, plies, center_bias=0.0):
+    """Plays plies random moves, never one that wins, so that even near-full boards
+    can be reached, playing the center column with probability center_bias whenever
+    it is allowed. Returns (board, symbol to move), or None when every move left
+    would have won or the board filled up."""
+    board = [[' '] * cols for _ in range(rows)]
+    symbol = 'X'
+    for _ in range(plies):
+        wins = winning_columns(board, symbol)
+        columns = [col for col in open_columns(board) if col not in wins]
+        if not columns:
+            return None
+        if cols // 2 in columns and generator.random() < center_bias:
+            drop_piece(board, cols // 2, symbol)
+        else:
+            drop_piece(board, generator.choice(columns), symbol)
+        symbol = other(symbol)
+    if not open_columns(board):
+        return None
+    return board, symbol
+
+
+def build_corpus(seed=1, check_agents=CORPUS_CHECK_AGENTS, move_time=0.05):
+    """
+    Description: Generates the benchmark positions from random games that favour the
+    center column. A position is kept only when no rule of the agents answers it (see
+    rule_answers) and every agent of check_agents, run with move_time seconds a move,
+    answers it with a search. Opening and midgame positions only measure speed and have
+    no reference answer. Tactical positions are won by force within TACTICAL_MOVES
+    moves but not at once, and every column that does so is a reference answer.
+    Near-full positions have few enough empty cells to be solved exactly, and every
+    column that keeps the best result is a reference answer.
+    """
+    agents = [load_agent(spec) for spec in check_agents]
+    for agent in agents:
+        configure_agent(agent, dict(BENCHMARK_SETTINGS, MOVE_TIME_LIMIT=move_time))
+    generator = random.Random(seed)
+    positions = []
+    for rows, cols in CORPUS_SIZES:
+        cells = rows * cols
+        found = {category: 0 for category in CORPUS_COUNTS}
+        while any(found[category] < CORPUS_COUNTS[category] for category in CORPUS_COUNTS):
+            category = generator.choice([category for category in CORPUS_COUNTS
+                                         if found[category] < CORPUS_COUNTS[category]])
+            if category == 'opening':
+                plies = generator.randint(rows, rows + 6)
+            elif category == 'midgame':
+                plies = generator.randint(cells // 4, cells // 2)
+            elif category == 'tactical':
+                plies = generator.randint(cells // 3, cells - 8)
+            else:
+                plies = cells - generator.randint(4, 7)
+            position = random_position(generator, rows, cols, plies, CENTER_BIAS)
+            if position is None:
+                continue
+            board, symbol = position
+            if rule_answers(board, symbol):
+                continue
+            reference = None
+            if category == 'tactical':
+                reference = forced_win_columns(board, symbol, TACTICAL_MOVES)
+                if not reference:
+                    continue
+            elif category == 'near_full':
+                reference = best_columns(board, symbol)
+            skipped = False
+            with quiet():
+                for agent in agents:
+                    agent.init_agent(symbol, rows, cols, [row[:] for row in board])
+                    agent.what_is_your_move([row[:] for row in board], rows, cols, symbol)
+                    skipped = skipped or answered_without_search(agent, symbol)
+            if skipped:
+                continue
+            found[category] += 1
+            positions.append({
+                'id': '%dx%d-%s-%d' % (rows, cols, category, found[category]),
+                'category': category, 'rows': rows, 'cols': cols, 'to_move': symbol,
+                'board': [''.join(row) for row in board],
+                'reference': None if reference is None else [col + 1 for col in reference]})
+    return {'version': 2, 'seed': seed, 'positions': positions}
+
+
+def load_corpus(path):
+    with open(path) as file:
+        corpus = json.load(file)
+    for position in corpus['positions']:
+        position['board'] = [list(row) for row in position['board']]
+    return corpus
+
+
+"""
+Measurements here
+"""
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def rule_check_win(board, symbol, last_move=None):
+    """check_win given to forward_chaining_reasoning. Like the agent's own, it only
+    looks through last_move when the agent passes one."""
+    if last_move is None:
+        return check_win(board, symbol)
+    return connects(board, last_move[0], last_move[1], symbol)
+
+
+def last_search_info(module, symbol):
+    """Nodes and depth of the agent's last search, if the agent reports them."""
+    report = getattr(module, 'last_search_info', None)
+    return report(symbol) if report is not None else None
+
+
+def answered_without_search(module, symbol):
+    """Whether the agent reports its searches and its last move came from none."""
+    if getattr(module, 'last_search_info', None) is None:
+        return False
+    info = last_search_info(module, symbol)
+    return not (info and info.get('nodes'))
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark_module(spec, corpus, repeat=3, settings=None):
+    """
+    Description: Runs every corpus position through one agent module. Each position
+    is timed repeat times from a fresh init_agent, then run once more under
+    tracemalloc for its peak memory, so tracing does not distort the latencies.
+    Positions the agent answers without a search (see answered_without_search) are
+    counted as rule_answered and left out of the latencies and nodes per second,
+    which then only measure searches.
+    """
+    module = load_agent(spec)
+    configure_agent(module, settings or {})
+    latencies, searched_nodes, searched_seconds, peaks = [], 0, 0.0, []
+    micro = {'heuristic': [], 'a_star': [], 'forward_chaining_reasoning': []}
+    records, matched, with_reference, rule_answered = [], 0, 0, 0
+    with quiet():
+        for position in corpus['positions']:
+            rows, cols, symbol = position['rows'], position['cols'], position['to_move']
+            board = position['board']
+            times, move, info, searched = [], None, None, True
+            for _ in range(repeat):
+                random.seed(0)
+                module.init_agent(symbol, rows, cols, [row[:] for row in board])
+                move, seconds = time_call(module.what_is_your_move, [row[:] for row in board],
+                                          rows, cols, symbol)
+                times.append(seconds)
+                info = last_search_info(module, symbol)
+                if answered_without_search(module, symbol):
+                    searched = False
+                elif info and info.get('nodes'):
+                    searched_nodes += info['nodes']
+                    searched_seconds += seconds
+            if searched:
+                latencies.extend(times)
+            else:
+                rule_answered += 1
+
+            module.init_agent(symbol, rows, cols, [row[:] for row in board])
+            tracemalloc.start()
+            module.what_is_your_move([row[:] for row in board], rows, cols, symbol)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            peaks.append(peak)
+
+            module.init_agent(symbol, rows, cols, [row[:] for row in board])
+            micro['heuristic'].append(time_call(module.heuristic, board, symbol, other(symbol))[1])
+            micro['forward_chaining_reasoning'].append(time_call(
+                module.forward_chaining_reasoning, [row[:] for row in board], rows, cols, symbol,
+                other(symbol), rule_check_win)[1])
+            random.seed(0)
+            micro['a_star'].append(time_call(module.a_star, [row[:] for row in board], rows,
+                                             cols, symbol, other(symbol))[1])
+
+            reference = position['reference']
+            if reference is not None:
+                with_reference += 1
+                matched += move in reference
+            records.append({'id': position['id'], 'category': position['category'],
+                            'move': move, 'reference': reference,
+                            'matches': None if reference is None else move in reference,
+                            'latency': statistics.median(times), 'peak_memory': peak,
+                            'search': info, 'searched': searched})
+
+    categories = {}
+    for record in records:
+        category = categories.setdefault(record['category'], {'latencies': [], 'matched': 0,
+                                                               'with_reference': 0})
+        if record['searched']:
+            category['latencies'].append(record['latency'])
+        if record['matches'] is not None:
+            category['with_reference'] += 1
+            category['matched'] += record['matches']
+    return {
+        'module': spec,
+        'move_latency': {'p50': percentile(latencies, 0.50), 'p95': percentile(latencies, 0.95),
+                         'p99': percentile(latencies, 0.99), 'max': max(latencies, default=None)},
+        'nodes_per_second': searched_nodes / searched_seconds if searched_seconds else None,
+        'peak_memory': {'median': statistics.median(peaks), 'max': max(peaks)},
+        'reference_match': {'matched': matched, 'total': with_reference},
+        'rule_answered': rule_answered,
+        'per_call': {name: {'p50': percentile(values, 0.50), 'p95': percentile(values, 0.95)}
+                     for name, values in micro.items()},
+        'categories': {name: {'p50': percentile(category['latencies'], 0.50),
+                              'matched': category['matched'],
+                              'with_reference': category['with_reference']}
+                       for name, category in categories.items()},
+        'positions': records,
+    }
+
+
+"""
+Reports here
+"""
+def milliseconds(seconds):
+    return '-' if seconds is None else '%.2f ms' % (seconds * 1000)
+
+
+def summary_lines(result):
+    """(label, value) rows of one module's report."""
+    lines = [('move p50', milliseconds(result['move_latency']['p50'])),
+             ('move p95', milliseconds(result['move_latency']['p95'])),
+             ('move p99', milliseconds(result['move_latency']['p99'])),
+             ('nodes/s', '-' if result['nodes_per_second'] is None
+              else '%.0f' % result['nodes_per_second']),
+             ('peak memory', '%.1f KiB' % (result['peak_memory']['max'] / 1024)),
+             ('reference', '%d/%d' % (result['reference_match']['matched'],
+                                      result['reference_match']['total'])),
+             ('rule answered', '%d' % result.get('rule_answered', 0))]
+    for name, times in sorted(result['per_call'].items()):
+        lines.append((name + ' p50', milliseconds(times['p50'])))
+    for name, category in sorted(result['categories'].items()):
+        lines.append((name + ' p50', milliseconds(category['p50'])))
+    return lines
+
+
+def print_side_by_side(columns):
+    """columns is a list of (title, result) pairs, printed one column each."""
+    rows = [dict(summary_lines(result)) for _, result in columns]
+    labels = [label for label, _ in summary_lines(columns[0][1])]
+    print('%-32s' % '' + ''.join('%-36s' % title[:35] for title, _ in columns))
+    for label in labels:
+        print('%-32s' % label + ''.join('%-36s' % row.get(label, '-') for row in rows))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Connect 4 agent modules.")
+    parser.add_argument('agents', nargs='*', help="module names or .py files of agents")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per position")
+    parser.add_argument('--move-time', type=float, default=0.2,
+                        help="sets MOVE_TIME_LIMIT of agents that have one")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', nargs='+', metavar='RESULTS',
+                        help="print saved JSON results side by side")
+    parser.add_argument('--build-corpus', metavar='PATH',
+                        help="generate a corpus file instead of benchmarking")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.build_corpus:
+        with open(args.build_corpus, 'w') as file:
+            json.dump(build_corpus(args.seed), file, indent=1)
+        return None
+    if args.compare:
+        columns = []
+        for path in args.compare:
+            with open(path) as file:
+                saved = json.load(file)
+            for result in saved['results']:
+                columns.append(('%s:%s' % (os.path.basename(path), result['module']), result))
+        print_side_by_side(columns)
+        return None
+    if not args.agents:
+        parser.error("give at least one agent, or --compare / --build-corpus")
+
+    corpus = load_corpus(args.corpus)
+    settings = dict(BENCHMARK_SETTINGS, MOVE_TIME_LIMIT=args.move_time)
+    results = [benchmark_module(spec, corpus, args.repeat, settings) for spec in args.agents]
+    print_side_by_side([(result['module'], result) for result in results])
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'corpus': os.path.basename(args.corpus),
+                       'corpus_version': corpus['version'], 'settings': settings,
+                       'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, file, indent=1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2675 @@
+#! /usr/bin/connect_4_engine.py
+
+"""
+Connect 4 engine shared by the agent files.
+
+Team1_Connect_4_Agent.py and Team2_Connect_4_Agent.py are thin adapters over this
+module: each calls adapt() with the settings it plays with, and everything else
+(init_agent, what_is_your_move, connect_4_result and the searches and tables
+behind them) comes from here, so the code is imported once per process however
+many agents use it.
+
+Importing the engine is kept cheap for a runner that starts a fresh process per
+match. Nothing is built at import time: the tables of a board size (window_index,
+zobrist_keys) are built on first use and saved under TABLE_CACHE_DIR, where the
+next process loads them, and numpy and the multiprocessing modules are only
+imported once a setting that needs them is used.
+"""
+
+# IMPORTS
+import random
+import heapq
+import itertools
+import math
+import time
+import collections
+import contextlib
+import functools
+import json
+import mmap
+import os
+import struct
+import sys
+import types
+
+# numpy is only needed by the batch evaluator and takes longer to import than the
+# rest of the engine, so load_numpy imports it the first time it is needed
+np = None
+
+# GAME SETTINGS
+# Pieces in a row that win the game (the game manager plays connect 4)
+WIN_LENGTH = 4
+# Boards at least this wide only search the columns within WIN_LENGTH - 1 of a piece
+NEAR_PIECES_MIN_COLS = 12
+
+# EVALUATION SETTINGS
+# Score window_evaluation gives each kind of window: all the agent's pieces (win) or
+# all the opponent's (opp_win), one piece short with the rest empty (three /
+# opp_three) and two pieces short with the rest empty (two / opp_two)
+WINDOW_WEIGHTS = {'win': 100000, 'opp_win': -200000, 'three': 1000, 'opp_three': -5000,
+                  'two': 100, 'opp_two': -200}
+# JSON file of weights used instead of WINDOW_WEIGHTS, such as the one
+# connect_4_selfplay.py writes; weights it leaves out keep their WINDOW_WEIGHTS value
+WEIGHTS_FILE = None
+
+# SEARCH SETTINGS
+# Search used when no rule applies: "alpha_beta", "mcts" or "a_star"
+SEARCH_ENGINE = "alpha_beta"
+# Seconds the alpha-beta search may spend on one move
+MOVE_TIME_LIMIT = 1.0
+# Most states a_star keeps in its priority queue
+ASTAR_FRONTIER_LIMIT = 20000
+# Playouts of the MCTS search per move (None runs it for MOVE_TIME_LIMIT instead)
+MCTS_ITERATIONS = None
+# Processes the alpha-beta search splits the root columns across (1 searches serially)
+SEARCH_WORKERS = 1
+# Let a_star score the children of a state with one heuristic_batch call (needs numpy)
+BATCH_EVALUATION = False
+# Keep searching in a background process while the opponent decides its move
+PONDER = False
+# Solve the game exactly once this many cells or fewer are empty (0 turns it off)
+ENDGAME_EMPTY_CELLS = 14
+# Slots of the endgame solver's memo, which bounds its memory
+ENDGAME_TABLE_SIZE = 262139
+# Look for forced wins and losing columns with ThreatAnalysis before searching, and
+# only search the columns it leaves
+THREAT_ANALYSIS = True
+# Play the first moves from an opening book, when there is one for the board size
+OPENING_BOOK = True
+# Folder of the opening books written by connect_4_opening_book.py
+OPENING_BOOK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'books')
+# Folder the tables of each board size are saved in once built, so that later
+# processes load them instead of building them again (None keeps them in memory only).
+# It is the user's own cache folder rather than one in the source tree, which may be
+# shared or read-only
+TABLE_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME')
+                               or os.path.join(os.path.expanduser('~'), '.cache'),
+                               'connect_4_engine')
+
+# INSTRUMENTATION (off unless one of these is set)
+# Called with a record (dict) of counters and timings after every move
+INSTRUMENTATION_CALLBACK = None
+# JSON-lines file the same records are appended to; True picks
+# "<agent name>_Stats.jsonl", next to the game manager's move files
+INSTRUMENTATION_LOG = None
+# Name of the agent in instrumentation records, set by adapt() to the agent module's
+AGENT_NAME = __name__
+
+# Settings each agent module keeps its own value of (see adapt)
+SETTING_NAMES = ('WIN_LENGTH', 'NEAR_PIECES_MIN_COLS', 'WINDOW_WEIGHTS', 'WEIGHTS_FILE',
+                 'SEARCH_ENGINE', 'MOVE_TIME_LIMIT', 'ASTAR_FRONTIER_LIMIT', 'MCTS_ITERATIONS',
+                 'SEARCH_WORKERS', 'BATCH_EVALUATION', 'PONDER', 'ENDGAME_EMPTY_CELLS',
+                 'ENDGAME_TABLE_SIZE', 'THREAT_ANALYSIS', 'OPENING_BOOK', 'OPENING_BOOK_DIR', 'TABLE_CACHE_DIR',
+                 'INSTRUMENTATION_CALLBACK', 'INSTRUMENTATION_LOG', 'AGENT_NAME')
+
+
+# Number of 1 bits of an int; int.bit_count only exists from Python 3.10, and the
+# game manager may run an older interpreter
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+else:
+    def popcount(value):
+        return bin(value).count('1')
+
+
+def load_numpy():
+    """Imports numpy as np on first use and returns it, or None when it is not installed."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+# HELPER FUNCTIONS
+# Print the Board
+def print_board(board):
+    """ Prints the connect 4 game board."""
+    for row in board:
+        print('|' + '|'.join(row) + '|')
+    print("-" * (len(board[0]) * 2 + 1))
+    print(' ' + ' '.join(str(i+1) for i in range(len(board[0]))))
+    return
+
+# Per-game state of the agent, one GameContext per player symbol
+_game_contexts = {}
+
+class GameContext:
+    """
+    Description: State the agent keeps for the whole game, created by init_agent and
+    reused by every call to what_is_your_move, so that work done for earlier moves
+    (such as the transposition table) is still available for later ones.
+    """
+    def __init__(self, player_symbol, rows, cols):
+        # Shorter windows leave the "two short" weight on empty windows, which the
+        # incremental evaluation (EvaluationState) never scores
+        if WIN_LENGTH < 3:
+            raise ValueError("WIN_LENGTH must be at least 3, not %d" % WIN_LENGTH)
+        self.player_symbol = player_symbol
+        self.rows = rows
+        self.cols = cols
+        self.win_length = WIN_LENGTH
+        self.window_index = window_index(rows, cols, self.win_length)
+        self.transposition_table = TranspositionTable(rows, cols)
+        self.move_orderer = MoveOrderer(rows, cols)
+        # summary of the most recent search, for reporting
+        self.last_search = None
+        # MoveStats of the move being decided, when instrumentation is on
+        self.stats = None
+        # worker processes of the parallel alpha-beta search, kept for the whole game
+        self.search_pool = None
+        if SEARCH_WORKERS > 1:
+            import concurrent.futures
+            self.search_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(SEARCH_WORKERS, cols), initializer=apply_settings,
+                initargs=(worker_settings(),))
+        # background process searching on the opponent's time, when PONDER is set
+        self.ponderer = None
+        if PONDER:
+            self.ponderer = Ponderer(rows, cols, self.win_length, player_symbol,
+                                     'O' if player_symbol == 'X' else 'X', worker_settings())
+        # memo of the endgame solver, created the first time it is used
+        self.endgame_table = None
+        # (node, position) of the MCTS tree below the agent's last move
+        self.mcts_tree = None
+
+    def close(self):
+        """Releases the resources of the game once it is over."""
+        if self.search_pool is not None:
+            self.search_pool.shutdown(wait=False, cancel_futures=True)
+            self.search_pool = None
+        if self.ponderer is not None:
+            self.ponderer.close()
+            self.ponderer = None
+
+
+def game_context(player_symbol, rows, cols):
+    """Returns the GameContext of player_symbol, creating a new one if init_agent was not
+    called for a game of this size and WIN_LENGTH."""
+    context = _game_contexts.get(player_symbol)
+    if context is None or (context.rows, context.cols, context.win_length) != (rows, cols, WIN_LENGTH):
+        if context is not None:
+            context.close()
+        context = GameContext(player_symbol, rows, cols)
+        _game_contexts[player_symbol] = context
+    return context
+
+
+def last_search_info(player_symbol):
+    """Returns the summary (engine, depth, nodes, ...) of the last search made for
+    player_symbol, or None if its last move came from a rule."""
+    context = _game_contexts.get(player_symbol)
+    return context.last_search if context is not None else None
+
+
+def init_agent(player_symbol, board_num_rows, board_num_cols, board):
+    """
+    Inits the agent. Should only need to be called once at the start of a game.
+    Creates the GameContext used for the game, which builds the WindowIndex of the board
+    size (shared by every game of that size), the transposition table, when
+    SEARCH_WORKERS > 1, the process pool of the parallel search and, when PONDER is set,
+    the pondering process, which starts right away if the opponent moves first.
+    Raises ValueError if WIN_LENGTH is below 3.
+    """
+    if player_symbol in _game_contexts:
+        _game_contexts[player_symbol].close()
+    refresh_weights()
+    context = GameContext(player_symbol, board_num_rows, board_num_cols)
+    _game_contexts[player_symbol] = context
+    if context.ponderer is not None:
+        position = Bitboard.from_board(board, context.win_length)
+        mine = popcount(position.masks.get(player_symbol, 0))
+        theirs = popcount(position.masks.get('O' if player_symbol == 'X' else 'X', 0))
+        # 'X' moves first
+        if theirs < mine or (theirs == mine and player_symbol == 'O'):
+            context.ponderer.start(position)
+    return True
+
+class AgentSession:
+    """
+    Description: One game of the agent, for hosts that run many games in one process
+    (such as connect_4_server.py) instead of one game at a time through the
+    module-level init_agent. Each session owns its GameContext, and move() puts it in
+    place for the duration of the call only, so games with the same player symbol do
+    not share a transposition table or search state. A session made through an agent
+    module plays with that module's settings (agent).
+    """
+    def __init__(self, player_symbol, rows, cols, board, agent=None):
+        self.player_symbol = player_symbol
+        self.rows = rows
+        self.cols = cols
+        self.agent = agent
+        saved = _game_contexts.pop(player_symbol, None)
+        try:
+            with agent_settings(agent):
+                init_agent(player_symbol, rows, cols, board)
+            self.context = _game_contexts.pop(player_symbol)
+        finally:
+            if saved is not None:
+                _game_contexts[player_symbol] = saved
+
+    def move(self, board):
+        """what_is_your_move for this game, returns a 1-based column."""
+        symbol = self.player_symbol
+        saved = _game_contexts.get(symbol)
+        _game_contexts[symbol] = self.context
+        try:
+            with agent_settings(self.agent):
+                return what_is_your_move(board, self.rows, self.cols, symbol)
+        finally:
+            # what_is_your_move replaces the context if the settings changed
+            self.context = _game_contexts.pop(symbol)
+            if saved is not None:
+                _game_contexts[symbol] = saved
+
+    def last_search(self):
+        return self.context.last_search
+
+    def close(self):
+        """Releases what the game set up, like connect_4_result does for init_agent."""
+        self.context.close()
+
+
+"""
+Agent Modules here
+"""
+@contextlib.contextmanager
+def agent_settings(agent):
+    """Puts the SETTING_NAMES values of an agent module in place of the engine's for
+    the duration of a with block, and the engine's back afterwards. agent None keeps
+    the engine's settings."""
+    if agent is None:
+        yield
+        return
+    engine = globals()
+    saved = {name: engine[name] for name in SETTING_NAMES}
+    engine.update((name, getattr(agent, name)) for name in SETTING_NAMES)
+    try:
+        yield
+    finally:
+        engine.update(saved)
+
+
+def worker_settings():
+    """The settings in force, for a worker process to apply with apply_settings. A
+    process started with spawn imports the engine afresh and would otherwise run with
+    its defaults rather than the agent's. INSTRUMENTATION_CALLBACK is left out, as a
+    callback may not be picklable and only the agent's own process records moves."""
+    settings = {name: globals()[name] for name in SETTING_NAMES}
+    settings['INSTRUMENTATION_CALLBACK'] = None
+    return settings
+
+
+def apply_settings(settings):
+    """Puts settings (see worker_settings) in place of the engine's for the rest of the
+    process. The initializer of the search workers."""
+    globals().update(settings)
+
+
+class AgentModule(types.ModuleType):
+    """
+    Description: Module type adapt() gives an agent file. The module holds its own
+    value of every setting in SETTING_NAMES, which the game manager and the tools set
+    as module attributes as before. Any other name is looked up in the engine:
+    functions are wrapped to run under agent_settings of the module, and AgentSession
+    makes sessions that keep the module's settings, so several agent modules with
+    different settings can share the engine in one process. Anything else, such as
+    the Bitboard class or BOOK_MAGIC, is the engine's own.
+    """
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        try:
+            value = globals()[name]
+        except KeyError:
+            raise AttributeError("module %r has no attribute %r" % (self.__name__, name)) from None
+        if value is AgentSession:
+            value = functools.partial(AgentSession, agent=self)
+        elif isinstance(value, types.FunctionType):
+            value = agent_function(self, value)
+        else:
+            return value
+        # kept, so the wrapper is only made the first time
+        setattr(self, name, value)
+        return value
+
+
+def agent_function(agent, function):
+    """function, called under agent_settings(agent)."""
+    @functools.wraps(function)
+    def call(*args, **kwargs):
+        with agent_settings(agent):
+            return function(*args, **kwargs)
+    return call
+
+
+def adapt(module_name, **settings):
+    """
+    Description: Turns the module module_name into an agent module (see AgentModule):
+    it gets the engine's value of every setting in SETTING_NAMES, overridden by
+    settings, with AGENT_NAME set to module_name. Called once by each agent file.
+    """
+    module = sys.modules[module_name]
+    unknown = set(settings) - set(SETTING_NAMES)
+    if unknown:
+        raise ValueError("unknown settings: %s" % ", ".join(sorted(unknown)))
+    module.__class__ = AgentModule
+    for name in SETTING_NAMES:
+        value = settings.get(name, globals()[name])
+        # a module's own copy of WINDOW_WEIGHTS, so changing one agent's leaves the others
+        setattr(module, name, dict(value) if isinstance(value, dict) else value)
+    module.AGENT_NAME = settings.get('AGENT_NAME', module_name)
+    return module
+
+
+"""
+Search Algorithm here
+"""
+class SearchNode:
+    """
+    Description: A state in the a_star priority queue. Instead of a board and the full
+    list of moves, it keeps the canonical Zobrist key of its position, the state it was
+    reached from (parent) and the column played from there, so moves() rebuilds the
+    path when it is needed. f = cost + heuristic is computed once and used for ordering.
+    """
+    __slots__ = ('key', 'parent', 'column', 'cost', 'heuristic', 'f')
+
+    def __init__(self, key, parent, column, cost, heuristic):
+        self.key = key
+        self.parent = parent
+        self.column = column
+        self.cost = cost
+        self.heuristic = heuristic
+        self.f = cost + heuristic
+
+    def __lt__(self, other):
+        return self.f < other.f
+
+    def moves(self):
+        """Columns played from the start state to reach this one."""
+        moves = []
+        node = self
+        while node.parent is not None:
+            moves.append(node.column)
+            node = node.parent
+        moves.reverse()
+        return moves
+
+
+def a_star(board, rows, columns, my_char, opp_char, candidates=None):
+    """
+        Description: Implements the A* search algorithm to determine the optimal move.
+        It explores possible game states by simulating moves, using a heuristic function
+        to evaluate the desirability of board configurations. A priority queue is used
+        to manage states to visit, prioritizing those with a better heuristic score
+        combined with the cost (depth) to reach them. The search is limited by max_depth.
+        Child states are scored with an EvaluationState that is moved along the path of
+        the state being expanded, so each child only rescores the windows through the
+        cell it fills instead of rescanning the whole board. Scores are cached in the
+        game's transposition table, so positions reached again through another move
+        order, or again on a later move of the game, are not evaluated twice. The queue
+        holds compact SearchNode states and is cut back to the best half of its states
+        whenever it grows past ASTAR_FRONTIER_LIMIT. With BATCH_EVALUATION the children
+        of a state are scored together by heuristic_batch. On wide boards only the
+        columns near the pieces are expanded (see Bitboard.candidate_columns), and only
+        the 0-based columns in candidates, when given, are tried as the first move.
+        A position reached again through another move order, or its mirror image, is
+        not queued twice. States of equal f(n) are expanded in the order they were
+        queued, so when several first moves lead to equally good states the choice
+        among them can differ from the first version's, whose order among them was
+        left to heapq; the best heuristic reached is the same.
+        Atharva Berde: 90% Designed and implemented first version of
+        the function.
+        Rajiv Mohan: 10% Tweaked this function with changes to depth checking and heapq.heappush
+    """
+    context = game_context(my_char, rows, columns)
+    stats = context.stats
+    evaluation_class = EvaluationState if stats is None else TimedEvaluationState
+    evaluation = evaluation_class(Bitboard.from_board(board, context.win_length), my_char, opp_char)
+    applied = []  # moves currently played on evaluation
+    table = context.transposition_table
+    table.new_search()
+    seen = set()  # positions already queued or expanded by this search
+    expanded = 0
+
+    def follow(moves):
+        """Brings evaluation to the position reached by moves, undoing only the part of
+        the current path that differs from them."""
+        common = 0
+        while common < len(applied) and common < len(moves) and applied[common] == moves[common]:
+            common += 1
+        while len(applied) > common:
+            evaluation.undo(applied.pop(), my_char)
+        for col in moves[common:]:
+            evaluation.play(col, my_char)
+            applied.append(col)
+
+    start = SearchNode(evaluation.canonical_key(), None, None, 0, evaluation.score) 
+    states = [] 
+    #store each state into a priority queue, states of equal f(n) in the order they came
+    pushed = itertools.count()
+    heapq.heappush(states, (-start.f, next(pushed), start)) 
+    seen.add(start.key)
+    optimal_state = start
+    max_depth = 4
+
+    while states:
+        #get the f(n) value and current state(lowest state)
+        f_n, _, curr = heapq.heappop(states)   
+        if curr.cost >= max_depth:
+            continue
+        expanded += 1
+        if stats is not None:
+            stats.nodes += 1
+            stats.heap_peak = max(stats.heap_peak, len(states) + 1)
+        follow(curr.moves())
+        best_column, best_heuristic = None, None
+        columns1 = evaluation.position.candidate_columns()
+        if curr.parent is None and candidates is not None:
+            columns1 = [column for column in columns1 if column in candidates]
+        keys1 = [evaluation.keys_after(column, my_char) for column in columns1]
+        heuristics1 = []
+        for key1, mirror_key1 in keys1:
+            entry = table.probe(key1, mirror_key1)
+            heuristics1.append(entry[1] if entry is not None and entry[0] == 0 and entry[2] == EXACT
+                               else None)
+        missing = [i for i, heuristic1 in enumerate(heuristics1) if heuristic1 is None]
+        if stats is not None:
+            stats.tt_hits += len(heuristics1) - len(missing)
+        if missing:
+            if BATCH_EVALUATION and load_numpy() is not None:
+                batch_start = time.perf_counter()
+                scores = score_children(evaluation.position, [columns1[i] for i in missing],
+                                        my_char, opp_char)
+                if stats is not None:
+                    stats.evaluation_seconds += time.perf_counter() - batch_start
+            else:
+                scores = []
+                for i in missing:
+                    evaluation.play(columns1[i], my_char)
+                    scores.append(evaluation.score)
+                    evaluation.undo(columns1[i], my_char)
+            for i, heuristic1 in zip(missing, scores):
+                heuristics1[i] = heuristic1
+                table.store(keys1[i][0], keys1[i][1], 0, heuristic1, EXACT, None)
+        #explore all valid columns where move can be made
+        for column, (key1, mirror_key1), heuristic1 in zip(columns1, keys1, heuristics1): 
+            if best_heuristic is None or heuristic1 > best_heuristic:
+                best_column, best_heuristic = column, heuristic1
+            # a position (or its mirror image) reached before through another move order
+            # is already queued with the same cost and heuristic
+            if min(key1, mirror_key1) in seen:
+                continue
+            seen.add(min(key1, mirror_key1))
+            #new state with updated board after move
+            state1 = SearchNode(min(key1, mirror_key1), curr, column, curr.cost + 1, heuristic1)  
+            #push new state and its f(n) value to queue
+            heapq.heappush(states, (-state1.f, next(pushed), state1)) 
+            #update opitimal state
+            if state1.heuristic > optimal_state.heuristic: 
+                optimal_state = state1 
+        table.store(evaluation.key, evaluation.mirror_key, 0, curr.heuristic, EXACT, best_column)
+        #keep only the most promising states when the queue grows too large
+        if len(states) > ASTAR_FRONTIER_LIMIT:
+            states = heapq.nsmallest(ASTAR_FRONTIER_LIMIT // 2, states)
+
+    context.last_search = {'engine': 'a_star', 'depth': max_depth, 'nodes': expanded}
+    if stats is not None:
+        stats.engine = 'a_star'
+        stats.evaluation_seconds += evaluation.seconds
+    if optimal_state.parent is not None:         
+        return optimal_state.moves()[0] + 1
+    else:
+        valid_columns = [col+1 for col in range(columns) if board[0][col] == ' ']
+        return random.choice(valid_columns)
+    
+
+# Score of a won position, above any heuristic value. A win is worth WIN_SCORE plus
+# the number of cells still empty, so quicker wins score higher.
+WIN_SCORE = 10 ** 12
+
+class SearchTimeout(Exception):
+    """Raised inside AlphaBetaSearch when the move deadline has passed."""
+
+
+class MoveOrderer:
+    """
+    Description: Decides in which order AlphaBetaSearch tries the columns of a position,
+    since alpha-beta prunes most when the best move comes first. Columns are ranked by:
+    1. the best move stored in the transposition table for the position,
+    2. the killer moves of the ply, the last two columns that caused a cutoff at the
+       same distance from the root,
+    3. the history score of the cell the piece would land in, which grows every time
+       a move into that cell causes a cutoff,
+    4. the static order, center columns first.
+    Only the columns of Bitboard.candidate_columns are returned. The history table is kept for the whole game and halved before each search, the
+    killer moves only last for one search. It also counts how often the first move
+    tried caused the cutoff, which tells how good the ordering is.
+    """
+    def __init__(self, rows, cols):
+        center = (cols - 1) / 2
+        self.static_order = sorted(range(cols), key=lambda col: abs(col - center))
+        self.ranks = [0] * cols
+        for rank, col in enumerate(self.static_order):
+            self.ranks[col] = rank
+        self.stride = rows + 1
+        self.history = {'X': [0] * (cols * self.stride), 'O': [0] * (cols * self.stride)}
+        self.killers = []
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.searched_nodes = 0
+
+    def new_search(self):
+        self.killers = []
+        self.cutoffs = self.first_move_cutoffs = self.searched_nodes = 0
+        for history in self.history.values():
+            for cell in range(len(history)):
+                history[cell] >>= 1
+
+    def order(self, position, ply, symbol, tt_move):
+        """Returns the candidate columns of position, best candidates first."""
+        self.searched_nodes += 1
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history[symbol]
+        stride = self.stride
+        heights = position.heights
+        ranks = self.ranks
+        ranked = []
+        for col in position.candidate_columns():
+            rank = ranks[col]
+            if col == tt_move:
+                priority = 3
+            elif col in killers:
+                priority = 2 if col == killers[0] else 1
+            else:
+                priority = 0
+            ranked.append((-priority, -history[col * stride + heights[col]], rank, col))
+        ranked.sort()
+        return [move[3] for move in ranked]
+
+    def record_cutoff(self, ply, symbol, col, cell, depth, tried):
+        """Called when col, the tried-th move of a node (0 for the first), caused a
+        beta cutoff at ply with depth plies left."""
+        self.cutoffs += 1
+        if tried == 0:
+            self.first_move_cutoffs += 1
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if not killers or killers[0] != col:
+            killers.insert(0, col)
+            del killers[2:]
+        self.history[symbol][cell] += depth * depth
+
+    def stats(self):
+        """Cutoff statistics of the current search."""
+        return {'ordered_nodes': self.searched_nodes, 'cutoffs': self.cutoffs,
+                'first_move_cutoff_rate': (self.first_move_cutoffs / self.cutoffs
+                                           if self.cutoffs else None)}
+
+
+class AlphaBetaSearch:
+    """
+    Description: Negamax search with alpha-beta pruning. Unlike a_star it alternates
+    my_char and opp_char moves, so the opponent's best reply is taken into account.
+    Scores are from the point of view of the side to move; the heuristic value of a
+    leaf is negated when it is the opponent's turn. Results are shared with the game's
+    transposition table, where they are kept from the agent's point of view.
+    """
+    def __init__(self, position, my_char, opp_char, table, orderer, deadline=None,
+                 evaluation_class=None, stop=None):
+        self.evaluation = (evaluation_class or EvaluationState)(position, my_char, opp_char)
+        self.my_char = my_char
+        self.opp_char = opp_char
+        self.table = table
+        self.orderer = orderer
+        self.deadline = deadline
+        # called now and then during the search, which is abandoned when it returns True
+        self.stop = stop
+        self.nodes = 0
+        self.tt_hits = 0
+        self.empty = self.root_empty = position.rows * position.cols - sum(position.heights)
+        self.static_order = orderer.static_order
+
+    def negamax(self, depth, alpha, beta, symbol, other):
+        self.nodes += 1
+        if not self.nodes & 1023 and (
+                (self.deadline is not None and time.perf_counter() > self.deadline)
+                or (self.stop is not None and self.stop())):
+            raise SearchTimeout()
+        evaluation = self.evaluation
+        sign = 1 if symbol == self.my_char else -1
+        entry = self.table.probe(evaluation.key, evaluation.mirror_key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry[3]
+            # only reuse results of the same depth, so the outcome does not depend
+            # on what earlier searches happened to leave in the table
+            if entry[0] == depth:
+                value, flag = sign * entry[1], entry[2]
+                if sign < 0 and flag != EXACT:
+                    flag = LOWER_BOUND if flag == UPPER_BOUND else UPPER_BOUND
+                if (flag == EXACT or (flag == LOWER_BOUND and value >= beta)
+                        or (flag == UPPER_BOUND and value <= alpha)):
+                    self.tt_hits += 1
+                    return value
+        if depth == 0:
+            return sign * evaluation.score
+
+        position = evaluation.position
+        ply = self.root_empty - self.empty
+        original_alpha = alpha
+        best, best_move = None, None
+        self.empty -= 1
+        try:
+            moves = self.orderer.order(position, ply, symbol, tt_move)
+            for tried, col in enumerate(moves):
+                cell = evaluation.play(col, symbol)
+                if position.is_win(symbol):
+                    value = WIN_SCORE + self.empty
+                elif self.empty == 0:
+                    value = 0
+                else:
+                    value = -self.negamax(depth - 1, -beta, -alpha, other, symbol)
+                evaluation.undo(col, symbol)
+                if best is None or value > best:
+                    best, best_move = value, col
+                    if value > alpha:
+                        alpha = value
+                        if alpha >= beta:
+                            self.orderer.record_cutoff(ply, symbol, col, cell, depth, tried)
+                            break
+        finally:
+            self.empty += 1
+
+        if best <= original_alpha:
+            flag = UPPER_BOUND
+        elif best >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        if sign < 0 and flag != EXACT:
+            flag = LOWER_BOUND if flag == UPPER_BOUND else UPPER_BOUND
+        self.table.store(evaluation.key, evaluation.mirror_key, depth, sign * best, flag, best_move)
+        return best
+
+    def search_root(self, depth, candidates=None):
+        """
+        Searches every my_char move at the root, or the 0-based columns in candidates, to
+        depth plies and returns (column, score). Each
+        move after the first is searched with a window just below the best score so far,
+        so equal scores are recognised and the tie goes to the move nearest the center.
+        """
+        symbol, other = self.my_char, self.opp_char
+        evaluation = self.evaluation
+        position = evaluation.position
+        entry = self.table.probe(evaluation.key, evaluation.mirror_key)
+        moves = self.orderer.order(position, 0, symbol, entry[3] if entry is not None else None)
+        if candidates is not None:
+            moves = [col for col in moves if col in candidates]
+        best, best_move = None, None
+        self.empty -= 1
+        try:
+            for col in moves:
+                evaluation.play(col, symbol)
+                if position.is_win(symbol):
+                    value = WIN_SCORE + self.empty
+                elif self.empty == 0:
+                    value = 0
+                else:
+                    alpha = -WIN_SCORE * 2 if best is None else best - 1
+                    value = -self.negamax(depth - 1, -WIN_SCORE * 2, -alpha, other, symbol)
+                evaluation.undo(col, symbol)
+                if (best is None or value > best or (value == best and
+                        self.static_order.index(col) < self.static_order.index(best_move))):
+                    best, best_move = value, col
+        finally:
+            self.empty += 1
+        self.table.store(evaluation.key, evaluation.mirror_key, depth, best, EXACT, best_move)
+        return best_move, best
+
+
+def alpha_beta(board, rows, columns, my_char, opp_char, time_limit=None, max_depth=None,
+               pondered=None, candidates=None):
+    """
+    Description: Iterative-deepening alpha-beta search. It searches 1, 2, 3, ... plies
+    ahead with AlphaBetaSearch until time_limit seconds (MOVE_TIME_LIMIT by default)
+    have passed, or max_depth is reached, and returns the best column of the last
+    depth that finished, as a 1-based column like a_star. The first depth always
+    finishes so a move is always found. Each depth starts from the best moves stored
+    in the transposition table by the previous one and from the killer and history
+    tables of the game's MoveOrderer, which makes the repeated shallow searches cheap.
+    When the game has a search pool, the root columns are searched in parallel by
+    parallel_search_root instead, which picks the same column at the same depth.
+    pondered is the (depth, column, score) the pondering process already found for
+    the position, in which case the search carries on from the next depth. When
+    candidates is given, only those 0-based columns are searched at the root.
+    """
+    if time_limit is None:
+        time_limit = MOVE_TIME_LIMIT
+    context = game_context(my_char, rows, columns)
+    table = context.transposition_table
+    table.new_search()
+    context.move_orderer.new_search()
+    position = Bitboard.from_board(board, context.win_length)
+    stats = context.stats
+    search = AlphaBetaSearch(position, my_char, opp_char, table, context.move_orderer,
+                             evaluation_class=None if stats is None else TimedEvaluationState)
+    deadline = time.perf_counter() + time_limit
+    if max_depth is None:
+        max_depth = search.empty
+    best_move, best_score, completed = None, None, 0
+    last_depth = min(max_depth, search.empty)
+    if pondered is not None and candidates is not None and pondered[1] not in candidates:
+        pondered = None
+    if pondered is not None:
+        completed, best_move, best_score = pondered
+        search.deadline = deadline
+        if abs(best_score) >= WIN_SCORE:
+            last_depth = completed
+    for depth in range(completed + 1, last_depth + 1):
+        if context.search_pool is not None:
+            result = parallel_search_root(context.search_pool, position, my_char, opp_char,
+                                          depth, deadline if completed else None, candidates,
+                                          best_move)
+            if result is None:
+                break
+            best_move, best_score, nodes = result
+            search.nodes += nodes
+        else:
+            try:
+                best_move, best_score = search.search_root(depth, candidates)
+            except SearchTimeout:
+                break
+        completed = depth
+        if abs(best_score) >= WIN_SCORE or time.perf_counter() > deadline:
+            break
+        search.deadline = deadline
+    context.last_search = {'engine': 'alpha_beta', 'depth': completed, 'nodes': search.nodes,
+                           'score': best_score,
+                           'pondered_depth': pondered[0] if pondered is not None else 0}
+    context.last_search.update(context.move_orderer.stats())
+    if stats is not None:
+        stats.engine = 'alpha_beta'
+        stats.nodes += search.nodes
+        stats.tt_hits += search.tt_hits
+        stats.evaluation_seconds += search.evaluation.seconds
+    if best_move is None:
+        return random.choice(position.valid_columns()) + 1
+    return best_move + 1
+
+
+# Transposition table and move orderer of each search worker process, per game setup
+_worker_searches = {}
+
+
+def search_child(rows, cols, win_length, masks, heights, my_char, opp_char, depth, alpha, beta,
+                 seconds_left):
+    """
+    Description: Runs in a search worker process. Searches the position given by masks
+    and heights, where opp_char is to move, depth plies deep within the window (alpha,
+    beta) of my_char's point of view and returns (score, nodes), score being from
+    my_char's point of view, or None if seconds_left ran out first. As in negamax, a
+    score inside the window is exact and one outside it is a bound. The worker keeps
+    its transposition table between calls, so it gets warmer as the game goes on.
+    """
+    key = (rows, cols, win_length, my_char)
+    if key not in _worker_searches:
+        _worker_searches[key] = (TranspositionTable(rows, cols), MoveOrderer(rows, cols))
+    table, orderer = _worker_searches[key]
+    table.new_search()
+    orderer.new_search()
+    refresh_weights()
+    position = Bitboard(rows, cols, win_length)
+    position.masks = dict(masks)
+    position.heights = list(heights)
+    deadline = None if seconds_left is None else time.perf_counter() + seconds_left
+    search = AlphaBetaSearch(position, my_char, opp_char, table, orderer, deadline)
+    try:
+        value = -search.negamax(depth, -beta, -alpha, opp_char, my_char)
+    except SearchTimeout:
+        return None
+    return value, search.nodes
+
+
+def parallel_search_root(pool, position, my_char, opp_char, depth, deadline=None,
+                         candidates=None, first=None):
+    """
+    Description: Searches every root column of position depth plies deep across the
+    tasks of pool and returns (column, score, nodes), or None when deadline (a
+    time.perf_counter() value) passes before every column is done. The column first
+    (the best of the previous depth, else the one nearest the center) is searched
+    alone for its exact score. Every other column is then searched at once with a
+    null window just below that score, which only proves it worse, and the columns
+    that fail high are searched again for their exact score, as search_root does.
+    The best score wins with ties going to the column nearest the center, the same
+    rule search_root uses, so the result does not depend on how the columns were
+    spread over the workers. candidates restricts the root columns as it does for
+    search_root.
+    """
+    import concurrent.futures
+    center = (position.cols - 1) / 2
+    static_order = sorted(range(position.cols), key=lambda col: abs(col - center))
+    empty = position.rows * position.cols - sum(position.heights)
+    if candidates is None:
+        candidates = position.candidate_columns()
+    scores, searched = {}, []
+    for col in static_order:
+        if col not in candidates:
+            continue
+        position.play(col, my_char)
+        if position.is_win(my_char):
+            scores[col] = WIN_SCORE + empty - 1
+        elif empty == 1:
+            scores[col] = 0
+        else:
+            searched.append(col)
+        position.undo(col, my_char)
+    if first in searched:
+        searched.remove(first)
+        searched.insert(0, first)
+
+    def submit(col, alpha, beta):
+        position.play(col, my_char)
+        seconds_left = None if deadline is None else deadline - time.perf_counter()
+        # copies, since the arguments are only pickled once the task is sent
+        future = pool.submit(search_child, position.rows, position.cols, position.win_length,
+                             dict(position.masks), tuple(position.heights), my_char, opp_char,
+                             depth - 1, alpha, beta, seconds_left)
+        position.undo(col, my_char)
+        return future
+
+    def results(futures):
+        """Yields (column, score) of futures as they finish, None if time runs out."""
+        timeout = None if deadline is None else max(0, deadline - time.perf_counter())
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=timeout):
+                result = future.result()
+                if result is None:
+                    yield None
+                    return
+                nodes[0] += result[1]
+                yield futures[future], result[0]
+        except concurrent.futures.TimeoutError:
+            yield None
+        finally:
+            for future in futures:
+                future.cancel()
+
+    nodes = [0]
+    if searched:
+        for result in results({submit(searched[0], -WIN_SCORE * 2, WIN_SCORE * 2): searched[0]}):
+            if result is None:
+                return None
+            scores[searched[0]] = result[1]
+    best = max(scores.values())
+    # a column scoring best or more is tied with or better than the best so far
+    tests = {submit(col, best - 1, best): col for col in searched[1:]}
+    exact = {}
+    for result in results(tests):
+        if result is None:
+            return None
+        col, value = result
+        if value >= best:
+            exact[submit(col, best - 1, WIN_SCORE * 2)] = col
+    for result in results(exact):
+        if result is None:
+            return None
+        scores[result[0]] = result[1]
+    best_move = None
+    for col in static_order:
+        if col in scores and (best_move is None or scores[col] > scores[best_move]):
+            best_move = col
+    return best_move, scores[best_move], nodes[0]
+
+
+"""
+Pondering here
+"""
+class Ponderer:
+    """
+    Description: The pondering process of a game. After the agent moves, start() hands
+    it the position, with the opponent to move, and it searches the agent's best answer
+    to every opponent reply (see ponder_worker) while the opponent is thinking. When
+    the agent is asked for its next move, stop() collects what was found for the reply
+    actually played, so alpha_beta can start deeper than it otherwise would. The
+    process waits on its end of the pipe between positions and uses no time then.
+    """
+    def __init__(self, rows, cols, win_length, my_char, opp_char, settings):
+        import multiprocessing
+        self.opp_char = opp_char
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=ponder_worker, daemon=True,
+                                               args=(child_connection, rows, cols, win_length,
+                                                     my_char, opp_char, settings))
+        self.process.start()
+        child_connection.close()
+        # position being pondered, None when the process is idle
+        self.position = None
+
+    def start(self, position):
+        """Starts pondering position, where the opponent is to move."""
+        self.position = position.copy()
+        self.connection.send(('ponder', dict(position.masks), tuple(position.heights)))
+
+    def stop(self, board):
+        """
+        Stops pondering and returns the (depth, column, score) found for the position on
+        board, or None if board is not the pondered position after one opponent reply
+        or that reply was not searched yet.
+        """
+        if self.position is None:
+            return None
+        pondered, self.position = self.position, None
+        try:
+            self.connection.send(('stop',))
+            # the worker checks for messages every 1024 nodes, so this is quick
+            if not self.connection.poll(1.0):
+                raise EOFError()
+            results = self.connection.recv()
+        except (EOFError, OSError):
+            self.close()
+            return None
+        position = Bitboard.from_board(board, pondered.win_length)
+        for reply, result in results.items():
+            pondered.play(reply, self.opp_char)
+            found = pondered.masks == position.masks
+            pondered.undo(reply, self.opp_char)
+            if found:
+                return result
+        return None
+
+    def close(self):
+        """Ends the pondering process."""
+        if self.process is None:
+            return
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+        self.process = None
+        self.position = None
+
+
+def ponder_worker(connection, rows, cols, win_length, my_char, opp_char, settings):
+    """
+    Description: Runs in the pondering process, under the agent's settings (see
+    worker_settings). Receives ('ponder', masks, heights)
+    with a position where opp_char is to move, ponders it until ('stop',) arrives and
+    then sends back {reply column: (depth, column, score)}, the best my_char answer
+    found to each opp_char reply searched so far. None ends the process. Its
+    transposition table and move orderer are kept for the whole game.
+    """
+    apply_settings(settings)
+    table, orderer = TranspositionTable(rows, cols), MoveOrderer(rows, cols)
+    while True:
+        message = connection.recv()
+        if message is None:
+            return
+        results = {}
+        if message[0] == 'ponder':
+            refresh_weights()
+            position = Bitboard(rows, cols, win_length)
+            position.masks = dict(message[1])
+            position.heights = list(message[2])
+            ponder(position, my_char, opp_char, table, orderer, results, connection.poll)
+            message = connection.recv()
+            if message is None:
+                return
+        connection.send(results)
+
+
+def ponder(position, my_char, opp_char, table, orderer, results, stop):
+    """
+    Description: Searches my_char's answer to every opp_char move in position with
+    AlphaBetaSearch, all replies to depth 1, then all to depth 2 and so on, so every
+    reply is covered before any is searched deeper. Within a depth, the replies the
+    heuristic likes best for opp_char go first, as the opponent is most likely to play
+    them. results[reply] is updated after each finished search and stays as it is once
+    it is a proven win or loss. Returns when stop() returns True or nothing is left to
+    search.
+    """
+    table.new_search()
+    orderer.new_search()
+    evaluation = EvaluationState(position, my_char, opp_char)
+    replies = []
+    for col in position.candidate_columns():
+        evaluation.play(col, opp_char)
+        if not evaluation.position.is_win(opp_char) and not evaluation.position.is_full():
+            replies.append((evaluation.score, col))
+        evaluation.undo(col, opp_char)
+    replies = [col for score, col in sorted(replies, key=lambda reply: (reply[0],
+                                                                          orderer.ranks[reply[1]]))]
+    empty = position.rows * position.cols - sum(position.heights) - 1
+    for depth in range(1, empty + 1):
+        for col in replies:
+            if col in results and abs(results[col][2]) >= WIN_SCORE:
+                continue
+            position.play(col, opp_char)
+            search = AlphaBetaSearch(position, my_char, opp_char, table, orderer, stop=stop)
+            position.undo(col, opp_char)
+            try:
+                move, score = search.search_root(depth)
+            except SearchTimeout:
+                return
+            results[col] = (depth, move, score)
+            if stop():
+                return
+
+
+"""
+Monte Carlo Tree Search here
+"""
+class MCTSNode:
+    """
+    Description: A position in the MCTS tree, reached when symbol dropped a piece into
+    column. visits counts the playouts through the node and wins the ones symbol won,
+    a draw counting as half. prior, between 0 and 1, is how the heuristic ranks the
+    move among its siblings. children stays None until the node is expanded, and
+    winner is set for a position where the game is over ('Draw' for a full board).
+    """
+    __slots__ = ('column', 'symbol', 'parent', 'children', 'visits', 'wins', 'prior', 'winner')
+
+    def __init__(self, column, symbol, parent, prior=1.0, winner=None):
+        self.column = column
+        self.symbol = symbol
+        self.parent = parent
+        self.children = None
+        self.visits = 0
+        self.wins = 0.0
+        self.prior = prior
+        self.winner = winner
+
+    def select_child(self, exploration):
+        """UCT choice among the children, with a bias toward the heuristic's favourites
+        that fades as they are visited. Unvisited children go first, best prior first."""
+        log_visits = math.log(self.visits or 1)
+        best, best_value = None, None
+        for child in self.children:
+            if child.visits == 0:
+                value = 2.0 + exploration + child.prior
+            else:
+                value = (child.wins / child.visits
+                         + exploration * math.sqrt(log_visits / child.visits)
+                         + child.prior / (1 + child.visits))
+            if best_value is None or value > best_value:
+                best, best_value = child, value
+        return best
+
+
+class MCTSSearch:
+    """
+    Description: UCT Monte Carlo tree search. Every iteration walks down the tree from
+    the root with select_child, playing the moves on an EvaluationState, expands the
+    leaf it reaches if it was visited before, scoring every child with the incremental
+    heuristic for its prior, and then plays a random game to the end on two plain
+    integer masks and a list of column heights. Only candidate columns (see
+    Bitboard.candidate_columns) become children, while playouts may use any column. The result is added to every node on
+    the path. The move played is the root child with the most visits.
+    """
+    exploration = 1.4
+
+    def __init__(self, position, root, my_char, opp_char):
+        self.evaluation = EvaluationState(position, my_char, opp_char)
+        self.root = root
+        self.my_char = my_char
+        self.opp_char = opp_char
+        self.iterations = 0
+        self.stride = position.stride
+        self.rows = position.rows
+        self.cols = position.cols
+        self.steps = run_steps(position.win_length)
+
+    def expand(self, node):
+        """Creates the children of node, the moves of the side to move in the position
+        the evaluation is at, with priors from the rank of their heuristic scores."""
+        evaluation = self.evaluation
+        position = evaluation.position
+        symbol = self.opp_char if node.symbol == self.my_char else self.my_char
+        sign = 1 if symbol == self.my_char else -1
+        scored = []
+        for col in position.candidate_columns():
+            evaluation.play(col, symbol)
+            if position.is_win(symbol):
+                winner = symbol
+            elif position.is_full():
+                winner = 'Draw'
+            else:
+                winner = None
+            scored.append((sign * evaluation.score, col, winner))
+            evaluation.undo(col, symbol)
+        scored.sort(key=lambda child: -child[0])
+        node.children = [MCTSNode(col, symbol, node, (len(scored) - rank) / len(scored), winner)
+                         for rank, (_, col, winner) in enumerate(scored)]
+
+    def rollout(self, symbol):
+        """Plays random moves from the evaluation's position, symbol first, and returns
+        the winner or 'Draw'."""
+        position = self.evaluation.position
+        masks = {self.my_char: position.masks.get(self.my_char, 0),
+                 self.opp_char: position.masks.get(self.opp_char, 0)}
+        heights = position.heights[:]
+        rows, stride, steps = self.rows, self.stride, self.steps
+        shifts = (1, stride, stride - 1, stride + 1)
+        other = self.opp_char if symbol == self.my_char else self.my_char
+        open_columns = [col for col in range(self.cols) if heights[col] < rows]
+        choice = random.choice
+        while open_columns:
+            col = choice(open_columns)
+            mask = masks[symbol] | 1 << (col * stride + heights[col])
+            masks[symbol] = mask
+            heights[col] += 1
+            if heights[col] == rows:
+                open_columns.remove(col)
+            for shift in shifts:
+                run = mask
+                for step in steps:
+                    run &= run >> step * shift
+                if run:
+                    return symbol
+            symbol, other = other, symbol
+        return 'Draw'
+
+    def iterate(self):
+        """One selection, expansion, playout and backup from the root."""
+        self.iterations += 1
+        evaluation = self.evaluation
+        node = self.root
+        path = []
+        while node.children is not None and node.winner is None:
+            node = node.select_child(self.exploration)
+            evaluation.play(node.column, node.symbol)
+            path.append(node)
+        if node.winner is None and (node.visits > 0 or node is self.root):
+            self.expand(node)
+            if node.children:
+                node = node.select_child(self.exploration)
+                evaluation.play(node.column, node.symbol)
+                path.append(node)
+        if node.winner is not None:
+            winner = node.winner
+        else:
+            winner = self.rollout(self.opp_char if node.symbol == self.my_char else self.my_char)
+        for step in reversed(path):
+            evaluation.undo(step.column, step.symbol)
+        while node is not None:
+            node.visits += 1
+            if winner == node.symbol:
+                node.wins += 1.0
+            elif winner == 'Draw':
+                node.wins += 0.5
+            node = node.parent
+
+    def best_child(self):
+        return max(self.root.children, key=lambda child: (child.visits, child.wins))
+
+
+def reused_tree(tree, position, my_char, opp_char):
+    """
+    Description: Returns the node of the tree kept from the agent's last move that
+    matches position, the agent's move and then the opponent's reply being played
+    on the kept (node, position) pair, with its parent cut off, or None when the
+    position did not come from it.
+    """
+    if tree is None:
+        return None
+    node, kept = tree
+    if node.children is None:
+        return None
+    for child in node.children:
+        kept.play(child.column, opp_char)
+        found = kept.masks == position.masks
+        kept.undo(child.column, opp_char)
+        if found:
+            child.parent = None
+            return child
+    return None
+
+
+def mcts(board, rows, columns, my_char, opp_char, iterations=None, time_limit=None,
+         candidates=None):
+    """
+    Description: Chooses a move with MCTSSearch and returns it as a 1-based column.
+    It runs iterations playouts when MCTS_ITERATIONS (or iterations) is set and for
+    time_limit seconds (MOVE_TIME_LIMIT by default) otherwise. The part of the tree
+    below the chosen move is kept in the GameContext, and on the next move the
+    subtree of the opponent's reply becomes the new root, so its playouts are reused.
+    When candidates is given, the root only keeps the children of those 0-based columns.
+    """
+    if iterations is None:
+        iterations = MCTS_ITERATIONS
+    if time_limit is None:
+        time_limit = MOVE_TIME_LIMIT
+    context = game_context(my_char, rows, columns)
+    position = Bitboard.from_board(board, context.win_length)
+    root = reused_tree(context.mcts_tree, position, my_char, opp_char)
+    reused = root.visits if root is not None else 0
+    if root is None:
+        root = MCTSNode(None, opp_char, None)
+    search = MCTSSearch(position, root, my_char, opp_char)
+    if candidates is not None:
+        if root.children is None:
+            search.expand(root)
+        kept = [child for child in root.children if child.column in candidates]
+        if kept:
+            root.children = kept
+    if iterations:
+        for _ in range(iterations):
+            search.iterate()
+    else:
+        deadline = time.perf_counter() + time_limit
+        while True:
+            search.iterate()
+            if time.perf_counter() > deadline:
+                break
+    best = search.best_child()
+    position.play(best.column, my_char)
+    best.parent = None
+    context.mcts_tree = (best, position)
+    context.last_search = {'engine': 'mcts', 'nodes': search.iterations,
+                           'reused_visits': reused, 'visits': best.visits,
+                           'score': best.wins / best.visits if best.visits else None}
+    if context.stats is not None:
+        context.stats.engine = 'mcts'
+        context.stats.nodes += search.iterations
+    return best.column + 1
+
+
+"""
+Endgame Solver here
+"""
+class EndgameTable:
+    """
+    Description: Fixed-size memo of the endgame solver, kept for the whole game so that
+    positions solved for one move are not solved again for the next. Each slot holds
+    (key, value, flag) with value from the point of view of the side to move, which
+    only depends on the position, and flag EXACT, LOWER_BOUND or UPPER_BOUND. A slot is
+    always overwritten by the newest result, so memory stays at size slots however
+    long the solver runs.
+    """
+    def __init__(self, size=None):
+        self.size = size or ENDGAME_TABLE_SIZE
+        self.entries = [None] * self.size
+
+    def probe(self, key):
+        """Returns (value, flag) stored for the position, or None."""
+        entry = self.entries[key % self.size]
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1], entry[2]
+
+    def store(self, key, value, flag):
+        self.entries[key % self.size] = (key, value, flag)
+
+
+def winning_cells(pieces, empty, stride, length):
+    """
+    Description: The cells of the empty mask that would complete length in a row for
+    pieces, a mask laid out like a Bitboard with the given stride. For each direction,
+    a cell with k pieces in a row just below it and length - 1 - k just above it
+    completes a line, which takes about 2 * length shifted ANDs per direction.
+    """
+    cells = 0
+    for shift in (1, stride, stride - 1, stride + 1):
+        # before[k] / after[k]: cells with k pieces in a row just below / above them
+        before, after = [-1], [-1]
+        for k in range(1, length):
+            before.append(before[-1] & (pieces << k * shift))
+            after.append(after[-1] & (pieces >> k * shift))
+        for k in range(length):
+            cells |= before[k] & after[length - 1 - k]
+    return cells & empty
+
+
+class EndgameSolver:
+    """
+    Description: Exact negamax search to the end of the game, used once few cells are
+    left empty. The position is two integers laid out like a Bitboard: current, the
+    pieces of the side to move, and mask, every piece on the board, so a move is two
+    bit operations and the pair identifies the position for the EndgameTable.
+    A position is worth e for the side to move when it wins with the move played while
+    e cells are empty, -e when the opponent does, and 0 for a draw, so the highest
+    value is the fastest win and, when every move loses, the longest defense.
+    Moves that let the opponent win at once are never tried, and the other moves are
+    tried first when they leave the most cells the mover could win on.
+    """
+    def __init__(self, rows, cols, win_length, table, deadline=None):
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.stride = stride = rows + 1
+        self.table = table
+        self.deadline = deadline
+        self.nodes = 0
+        self.bottom = sum(1 << col * stride for col in range(cols))
+        self.board_mask = self.bottom * ((1 << rows) - 1)
+        self.column_masks = [((1 << rows) - 1) << col * stride for col in range(cols)]
+        center = (cols - 1) / 2
+        self.static_order = sorted(range(cols), key=lambda col: abs(col - center))
+
+    def winning_cells(self, pieces, mask):
+        """Empty cells that would complete win_length in a row for pieces."""
+        return winning_cells(pieces, self.board_mask ^ mask, self.stride, self.win_length)
+
+    def non_losing_moves(self, current, mask):
+        """Cells the side to move can play without the opponent winning next, as a mask."""
+        playable = (mask + self.bottom) & self.board_mask
+        threats = self.winning_cells(current ^ mask, mask)
+        forced = playable & threats
+        if forced:
+            if forced & (forced - 1):
+                return 0  # two threats to block
+            playable = forced
+        # never play right below an opponent's winning cell
+        return playable & ~(threats >> 1)
+
+    def solve(self, current, mask, empty, alpha, beta):
+        """Value of the position for the side to move, which cannot win at once,
+        exact when it lies between alpha and beta and a bound of it otherwise."""
+        self.nodes += 1
+        if not self.nodes & 1023 and self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        moves = self.non_losing_moves(current, mask)
+        if not moves:
+            return -(empty - 1)
+        if empty <= 2:
+            return 0
+        # the soonest either side can still win
+        beta = min(beta, empty - 2)
+        alpha = max(alpha, -(empty - 3))
+        if alpha >= beta:
+            return alpha
+        key = current + mask
+        entry = self.table.probe(key)
+        if entry is not None:
+            value, flag = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+        original_alpha = alpha
+        best = None
+        for move in self.ordered_moves(current, mask, moves):
+            value = -self.solve(current ^ mask, mask | move, empty - 1, -beta, -alpha)
+            if best is None or value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        if best <= original_alpha:
+            flag = UPPER_BOUND
+        elif best >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, best, flag)
+        return best
+
+    def ordered_moves(self, current, mask, moves):
+        """The cells of moves, the ones leaving the mover the most winning cells first and
+        the static order (center first) between equals."""
+        ranked = []
+        for rank, col in enumerate(self.static_order):
+            move = moves & self.column_masks[col]
+            if move:
+                cells = popcount(self.winning_cells(current | move, mask | move))
+                ranked.append((-cells, rank, move))
+        ranked.sort()
+        return [move for _, _, move in ranked]
+
+    def solve_root(self, current, mask):
+        """
+        Returns (column, value) of the best move of the side to move, the column nearest
+        the center among equal values. Each move after the first only has to beat the
+        best value so far, so only the value of the move returned is exact.
+        """
+        empty = self.rows * self.cols - popcount(mask)
+        playable = (mask + self.bottom) & self.board_mask
+        winning = self.winning_cells(current, mask) & playable
+        if winning:
+            for col in self.static_order:
+                if winning & self.column_masks[col]:
+                    return col, empty
+        moves = self.non_losing_moves(current, mask)
+        if not moves:
+            # lost whatever is played, block one of the threats if there is one
+            threats = self.winning_cells(current ^ mask, mask) & playable
+            moves = threats or playable
+            for col in self.static_order:
+                if moves & self.column_masks[col]:
+                    return col, -(empty - 1)
+        best, best_move = None, None
+        for col in self.static_order:
+            move = moves & self.column_masks[col]
+            if not move:
+                continue
+            if empty == 1:
+                value = 0
+            else:
+                alpha = -(empty + 1) if best is None else best
+                value = -self.solve(current ^ mask, mask | move, empty - 1, -(empty + 1), -alpha)
+            if best is None or value > best:
+                best, best_move = value, col
+        return best_move, best
+
+
+def endgame_move(board, rows, columns, my_char, opp_char, time_limit=None):
+    """
+    Description: Solves the position exactly with EndgameSolver and returns the 1-based
+    column of the fastest win, of a draw, or of the longest defense, or None when
+    time_limit seconds (MOVE_TIME_LIMIT by default) pass first. What was solved before
+    the time ran out stays in the game's EndgameTable, so the next move gets further.
+    """
+    if time_limit is None:
+        time_limit = MOVE_TIME_LIMIT
+    context = game_context(my_char, rows, columns)
+    if context.endgame_table is None:
+        context.endgame_table = EndgameTable()
+    position = Bitboard.from_board(board, context.win_length)
+    current = position.masks.get(my_char, 0)
+    mask = current | position.masks.get(opp_char, 0)
+    solver = EndgameSolver(rows, columns, context.win_length, context.endgame_table,
+                           time.perf_counter() + time_limit)
+    stats = context.stats
+    try:
+        column, value = solver.solve_root(current, mask)
+    except SearchTimeout:
+        column = None
+    finally:
+        if stats is not None:
+            stats.nodes += solver.nodes
+    if column is None:
+        return None
+    context.last_search = {'engine': 'endgame', 'nodes': solver.nodes, 'score': value,
+                           'result': 'win' if value > 0 else 'loss' if value < 0 else 'draw'}
+    if stats is not None:
+        stats.engine = 'endgame'
+    return column + 1
+
+
+"""
+Opening Book here
+"""
+# Layout of an opening book file: a header, then one fixed-size record per position,
+# sorted by key. A record is the canonical Zobrist key of the position (the smaller
+# of its key and its mirror image's), the 0-based column to play in the orientation of
+# that key, and the depth it was searched to (BOOK_SOLVED if it was solved exactly).
+BOOK_MAGIC = b'C4OB'
+BOOK_VERSION = 2
+BOOK_HEADER = struct.Struct('<4sHBBBBI')  # magic, version, rows, cols, win length, plies, record count
+BOOK_RECORD = struct.Struct('<QBB')  # key, column, depth
+BOOK_SOLVED = 255
+
+# OpeningBook of each book file, board size and win length, or None when there is no
+# usable book for them
+_opening_books = {}
+
+
+def opening_book_path(rows, cols, win_length=4, directory=None):
+    """File the opening book of a rows x cols board is kept in."""
+    name = 'opening_%dx%d.bin' % (rows, cols)
+    if win_length != 4:
+        name = 'opening_%dx%d_n%d.bin' % (rows, cols, win_length)
+    return os.path.join(directory or OPENING_BOOK_DIR, name)
+
+
+class OpeningBook:
+    """
+    Description: Read-only view of an opening book file. The file is memory-mapped,
+    not read, so opening it costs the same whatever its size, and lookup() binary
+    searches the sorted records, touching only the few pages it needs.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols, self.win_length, self.plies, self.count = \
+            BOOK_HEADER.unpack_from(self.data, 0)
+        if (magic != BOOK_MAGIC or version != BOOK_VERSION
+                or len(self.data) != BOOK_HEADER.size + self.count * BOOK_RECORD.size):
+            self.data.close()
+            raise ValueError("%s is not a version %d opening book" % (path, BOOK_VERSION))
+
+    def lookup(self, key, mirror_key):
+        """Returns (column, depth) stored for the position with these Zobrist keys, or None."""
+        mirrored = mirror_key < key
+        if mirrored:
+            key = mirror_key
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, column, depth = BOOK_RECORD.unpack_from(
+                self.data, BOOK_HEADER.size + middle * BOOK_RECORD.size)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return (self.cols - 1 - column if mirrored else column), depth
+        return None
+
+    def close(self):
+        self.data.close()
+
+
+def opening_book(rows, cols, win_length=4):
+    """Returns the OpeningBook of a rows x cols board, opening it on first use, or None
+    if there is no valid book file for the size and win length. Books are kept by
+    path, since agents may have different OPENING_BOOK_DIRs."""
+    path = os.path.abspath(opening_book_path(rows, cols, win_length))
+    key = (path, rows, cols, win_length)
+    if key not in _opening_books:
+        try:
+            book = OpeningBook(path)
+        except (OSError, ValueError, struct.error):
+            book = None
+        if book is not None and (book.rows, book.cols, book.win_length) != key[1:]:
+            book.close()
+            book = None
+        _opening_books[key] = book
+    return _opening_books[key]
+
+
+def book_move(board, rows, columns, my_char):
+    """
+    Description: Returns the 1-based column the opening book gives for the position
+    on board, or None when there is no book for the board size, the game is past the
+    plies it covers, or the position is not in it.
+    """
+    context = game_context(my_char, rows, columns)
+    book = opening_book(rows, columns, context.win_length)
+    if book is None:
+        return None
+    position = Bitboard.from_board(board, context.win_length)
+    if sum(position.heights) > book.plies:
+        return None
+    found = book.lookup(*zobrist_keys(rows, columns).hash(position))
+    if found is None or not position.can_play(found[0]):
+        return None
+    context.last_search = {'engine': 'book', 'depth': found[1]}
+    if context.stats is not None:
+        context.stats.engine = 'book'
+    return found[0] + 1
+
+
+"""
+Threat Analysis here
+"""
+class ThreatAnalysis:
+    """
+    Description: Threat-space reasoning about a position with my_char to move, cheap
+    enough to run before every search. A threat of a player is an empty cell that
+    would complete win_length in a row for it; threats[symbol] holds them as a
+    Bitboard mask. Threats are also split by the parity of their row, counted from
+    1 at the bottom: once the board fills up, the first player ('X') can usually
+    make its odd threats count and the second its even ones (odd_threats and
+    even_threats). From the threats, without a search:
+    - win: a column my_char wins in right away,
+    - must_block: the columns the opponent would win in next move,
+    - forced_win: a column after which the opponent cannot stop a win, because it
+      leaves two threats the opponent could fill (a double threat) or one with
+      another threat right above it (stacked threats), while the opponent has no
+      win of its own,
+    - candidates: the columns worth searching, those that neither let the opponent
+      win at once (by filling the cell under one of its threats) nor let it make a
+      double or stacked threat of its own. When every column loses, all playable
+      columns are kept.
+    Columns are 0-based and lists are in the static order, center first. On boards at
+    least NEAR_PIECES_MIN_COLS wide only Bitboard.candidate_columns are looked at.
+    """
+    def __init__(self, position, my_char, opp_char):
+        self.my_char = my_char
+        self.opp_char = opp_char
+        self.stride = stride = position.stride
+        self.length = position.win_length
+        self.bottom = sum(1 << col * stride for col in range(position.cols))
+        self.board_mask = self.bottom * ((1 << position.rows) - 1)
+        self.odd_rows = self.bottom * sum(1 << height for height in range(0, position.rows, 2))
+        mine = position.masks.get(my_char, 0)
+        theirs = position.masks.get(opp_char, 0)
+        occupied = mine | theirs
+        self.threats = {my_char: self.threat_cells(mine, occupied),
+                        opp_char: self.threat_cells(theirs, occupied)}
+        center = (position.cols - 1) / 2
+        columns = sorted(position.candidate_columns(), key=lambda col: abs(col - center))
+        self.cells = {col: 1 << (col * stride + position.heights[col]) for col in columns}
+
+        self.win = next((col for col in columns
+                         if self.cells[col] & self.threats[my_char]), None)
+        self.must_block = [col for col in columns if self.cells[col] & self.threats[opp_char]]
+        self.forced_win = None
+        if self.win is not None:
+            self.candidates = [self.win]
+        elif self.must_block:
+            self.candidates = self.must_block[:1]
+        else:
+            safe, unrefuted = [], []
+            for col in columns:
+                move = self.cells[col]
+                if move << 1 & self.threats[opp_char]:
+                    continue  # the opponent would win on top of it
+                safe.append(col)
+                after = occupied | move
+                my_threats = self.threat_cells(mine | move, after)
+                if self.forced_win is None and self.forcing(my_threats, self.playable(after)):
+                    self.forced_win = col
+                if not self.refuted(mine | move, theirs, after, my_threats):
+                    unrefuted.append(col)
+            self.candidates = unrefuted or safe or columns
+
+    def playable(self, occupied):
+        """The cells a piece can be dropped into, the lowest empty cell of each column."""
+        return (occupied + self.bottom) & self.board_mask
+
+    def threat_cells(self, pieces, occupied):
+        return winning_cells(pieces, self.board_mask ^ occupied, self.stride, self.length)
+
+    @staticmethod
+    def forcing(threats, playable):
+        """Whether a player with these threats, to move after its opponent, wins by force
+        when the opponent has no win of its own: two threats can be filled at once
+        (double threat), or one can with another right above it (stacked threats)."""
+        immediate = threats & playable
+        return bool(immediate & (immediate - 1) or immediate & (threats >> 1))
+
+    def refuted(self, mine, theirs, occupied, my_threats):
+        """Whether the opponent, to move with my pieces mine, has a reply that wins by
+        force: a move after which I cannot win at once and it is forcing."""
+        playable = self.playable(occupied)
+        opp_threats = self.threats[self.opp_char] & ~occupied
+        if opp_threats & playable:
+            return True
+        replies = playable & ~(my_threats >> 1)  # a reply under my threat loses
+        while replies:
+            reply = replies & -replies
+            replies ^= reply
+            after = occupied | reply
+            after_playable = self.playable(after)
+            if my_threats & ~reply & after_playable:
+                continue  # the reply leaves me a win
+            if self.forcing(self.threat_cells(theirs | reply, after), after_playable):
+                return True
+        return False
+
+    def odd_threats(self, symbol):
+        return self.threats[symbol] & self.odd_rows
+
+    def even_threats(self, symbol):
+        return self.threats[symbol] & ~self.odd_rows
+
+    def summary(self):
+        """Counts of the threats of each player by parity, and the outcome of the
+        analysis, for reporting."""
+        summary = {'win': self.win, 'must_block': self.must_block,
+                   'forced_win': self.forced_win, 'candidates': self.candidates}
+        for symbol in (self.my_char, self.opp_char):
+            summary[symbol] = {'odd': popcount(self.odd_threats(symbol)),
+                               'even': popcount(self.even_threats(symbol))}
+        return summary
+
+
+"""
+Reasoning Scheme and Rule Based Representation here
+"""    
+def forward_chaining_reasoning(board, game_rows, game_cols, my_game_symbol, opp_char, check_win,
+                               stats=None, threats=None):
+    """
+    Description: Implements a rule-based reasoning system to decide a move.
+    Follows a strict order of rules:
+    1. If a winning move is available for the agent, take it.
+    2. If the opponent has an immediate winning move, block it.
+    3. If a move wins by force (a double or stacked threat), take it.
+    4. If only one move does not lose by force, take it.
+    5. If the center column is available, and does not lose by force, take it.
+    Rules 3 and 4, and the check of rule 5, need the ThreatAnalysis of the position
+    (threats) and are skipped without one.
+    If none of these rules apply, it returns None, indicating no move was found by this method.
+    check_win(board, symbol, last_move) only needs to look at the lines through last_move.
+    When a MoveStats is given, the rule that fired is recorded in it.
+    Rajiv Mohan: 15% wrote out basic rules using rule based representation with pseudo-code
+    Jimmy Valdez: 85% Designed and implemented first version of
+    the function.
+    """
+    center_column = game_cols // 2
+    block_column = None
+
+    # Rules 1 and 2 share one pass over the columns. Each piece is dropped into the
+    # board in place, only the lines through it are checked, and it is taken back.
+    for column in range(game_cols):
+        if board[0][column] != ' ':
+            continue
+        row = game_rows - 1
+        while board[row][column] != ' ':
+            row -= 1
+        board[row][column] = my_game_symbol
+        wins = check_win(board, my_game_symbol, (row, column))
+        blocks = False
+        if not wins and block_column is None:
+            board[row][column] = opp_char
+            blocks = check_win(board, opp_char, (row, column))
+        board[row][column] = ' '
+
+        # Rule 1: Win if possible
+        if wins:
+            if stats is not None:
+                stats.rule = 'win'
+            return column
+        if blocks:
+            block_column = column
+
+    # Rule 2: Block opponent win
+    if block_column is not None:
+        if stats is not None:
+            stats.rule = 'block'
+        return block_column
+
+    if threats is not None:
+        # Rule 3: Win by force
+        if threats.forced_win is not None:
+            if stats is not None:
+                stats.rule = 'forced_win'
+            return threats.forced_win
+        # Rule 4: Play the only move that does not lose by force
+        if len(threats.candidates) == 1:
+            if stats is not None:
+                stats.rule = 'only_move'
+            return threats.candidates[0]
+
+    # Rule 5: Take center column
+    if board[0][center_column] == ' ' and (threats is None or center_column in threats.candidates):
+        if stats is not None:
+            stats.rule = 'center'
+        return center_column 
+
+    return None
+
+
+def what_is_your_move(board, game_rows, game_cols, my_game_symbol):
+    """
+        Description: 
+        Determines the agent's next move in the Connect 4 game.
+        It first attempts to find a move using the `forward_chaining_reasoning` function,
+        which applies a set of predefined rules (win, block, take center) and, with
+        THREAT_ANALYSIS, the rules of the position's ThreatAnalysis (win by force,
+        only move). If the forward chaining reasoning does not give a move, the agent
+        falls back to the search selected by SEARCH_ENGINE, over the candidate columns
+        the threat analysis leaves: the time-limited
+        "alpha_beta" search or the "a_star" search algorithm, both of which find
+        the best possible move based on a heuristic evaluation of future game states,
+        or the "mcts" Monte Carlo tree search, which judges moves by random playouts.
+        Once ENDGAME_EMPTY_CELLS or fewer cells are empty, the position is solved
+        exactly by endgame_move first, and the rules and search are only used if it
+        runs out of time, with whatever time is left. Early in the game the move
+        comes from the opening book instead, when OPENING_BOOK is set and the
+        position is in the book.
+    
+        Rajiv Mohan: 90% Designed and implemented first version of
+        the function with win checking
+        Jimmy Valdez: 10% Tweaked this function with addition of forward chaining reasoning
+    """
+    if my_game_symbol == 'X':
+        opp_char = 'O'
+    else:
+        opp_char = 'X'
+    
+    context = game_context(my_game_symbol, game_rows, game_cols)
+    refresh_weights()
+    pondered = None
+    if context.ponderer is not None:
+        pondered = context.ponderer.stop(board)
+    context.last_search = None
+    context.stats = None
+    if INSTRUMENTATION_CALLBACK is not None or INSTRUMENTATION_LOG:
+        context.stats = MoveStats()
+
+    # win checking, through last_move only when it is given
+    index = context.window_index
+    def check_win(bd, symbol, last_move=None):
+        if last_move is None:
+            windows = index.windows
+        else:
+            windows = [index.windows[i] for i in index.cell_windows[index.cell_bit(*last_move)]]
+        for window in windows:
+            if all(bd[row][col] == symbol for row, col in window):
+                return True
+        return False
+
+    #Solve the end of the game exactly when few cells are left
+    move, time_limit = None, None
+    empty_cells = sum(row.count(' ') for row in board)
+    if empty_cells <= ENDGAME_EMPTY_CELLS:
+        start = time.perf_counter()
+        move = endgame_move(board, game_rows, game_cols, my_game_symbol, opp_char)
+        time_limit = max(0.0, MOVE_TIME_LIMIT - (time.perf_counter() - start))
+    #Play the opening from the book
+    elif OPENING_BOOK:
+        move = book_move(board, game_rows, game_cols, my_game_symbol)
+
+    #Use forward chaining reasoning, with the threat analysis behind its rules
+    if move is None:
+        threats, candidates = None, None
+        if THREAT_ANALYSIS:
+            threats = ThreatAnalysis(Bitboard.from_board(board, context.win_length),
+                                     my_game_symbol, opp_char)
+            candidates = threats.candidates
+            if context.stats is not None:
+                context.stats.threats = threats.summary()
+        move = forward_chaining_reasoning(board, game_rows, game_cols, my_game_symbol, opp_char,
+                                          check_win, context.stats, threats)
+        if move is not None:
+            move += 1
+        #Otherwise, use A* Search Algorithm or alpha-beta search on the candidate columns
+        elif SEARCH_ENGINE == "a_star":
+            move = a_star(board, game_rows, game_cols, my_game_symbol, opp_char, candidates)
+        elif SEARCH_ENGINE == "mcts":
+            move = mcts(board, game_rows, game_cols, my_game_symbol, opp_char,
+                        time_limit=time_limit, candidates=candidates)
+        else:
+            move = alpha_beta(board, game_rows, game_cols, my_game_symbol, opp_char,
+                              time_limit=time_limit, pondered=pondered, candidates=candidates)
+
+    if context.stats is not None:
+        report_move(context, board, move)
+    if context.ponderer is not None:
+        position = Bitboard.from_board(board, context.win_length)
+        position.play(move - 1, my_game_symbol)
+        if not position.is_win(my_game_symbol) and not position.is_full():
+            context.ponderer.start(position)
+    return move
+
+
+def window_evaluation(window, my_char, opp_char):
+    """
+    Description: Assesses the strategic value of a WIN_LENGTH-cell segment (or "window") on the game board. 
+    It evaluates each window by counting how many cells are occupied by the agent (my_char),
+    the opponent (opp_char), and how many are empty. Based on these counts, it assigns 
+    a score reflecting how favorable or dangerous the window is. For example, if the agent 
+    has three pieces and one empty cell in a window, it's a strong opportunity to win and 
+    receives a high positive score. If the opponent has a similar setup, it 
+    receives a large negative score to prioritize blocking it. This scoring guides the agent's 
+    decision-making by helping the A* algorithm estimate which future board states are most 
+    beneficial or need immediate attention. The counts are relative to the length of
+    the window, so the same scores apply to any win length. The scores themselves come
+    from WINDOW_WEIGHTS, or from WEIGHTS_FILE when it is set (see window_weights).
+    Swan Pyae Sone Tun: 100% Designed and implemented first version of
+    the function.
+    """
+    score = 0
+    my_count = window.count(my_char)
+    opponent_count  = window.count(opp_char)
+    empty_count = window.count(' ')
+    length = len(window)
+    weights = window_weights()
+
+    if my_count == length:
+        score = weights['win']  # Our win
+    elif opponent_count == length:
+        score = weights['opp_win'] # Opponent's win - IMPORTANT TO BLOCK
+    elif my_count == length - 1 and empty_count == 1:  #One more to win for us
+        score = weights['three']
+    elif opponent_count == length - 1 and empty_count == 1: #One more to win for opponent
+        score = weights['opp_three'] #A* to block this
+    elif my_count == length - 2 and empty_count == 2:
+        score = weights['two']
+    elif opponent_count == length - 2 and empty_count == 2:
+        score = weights['opp_two']
+    return score
+
+
+# Order of the weights in weight vectors, such as the columns of window_features_batch
+WEIGHT_NAMES = ('win', 'opp_win', 'three', 'opp_three', 'two', 'opp_two')
+
+# (modification time, weights) last read from each weights file, keyed by path
+_weights_files = {}
+
+
+def refresh_weights():
+    """
+    Description: Reads WEIGHTS_FILE again if its modification time changed since it
+    was last read, such as when connect_4_selfplay.py rewrites it. Checked once per
+    move (by init_agent and what_is_your_move) and once per task of the search and
+    pondering processes, so window_weights itself makes no system calls.
+    """
+    if WEIGHTS_FILE is None:
+        return
+    modified = os.stat(WEIGHTS_FILE).st_mtime_ns
+    cached = _weights_files.get(WEIGHTS_FILE)
+    if cached is None or cached[0] != modified:
+        with open(WEIGHTS_FILE) as file:
+            loaded = json.load(file)
+        weights = dict(WINDOW_WEIGHTS)
+        weights.update((name, loaded['weights'][name]) for name in WEIGHT_NAMES
+                       if name in loaded['weights'])
+        _weights_files[WEIGHTS_FILE] = (modified, weights)
+
+
+def window_weights():
+    """
+    Description: The scores window_evaluation uses: WINDOW_WEIGHTS, updated with the
+    "weights" object of WEIGHTS_FILE when that is set. The file is read on first use
+    and afterwards only by refresh_weights.
+    """
+    if WEIGHTS_FILE is None:
+        return WINDOW_WEIGHTS
+    if WEIGHTS_FILE not in _weights_files:
+        refresh_weights()
+    return _weights_files[WEIGHTS_FILE][1]
+
+
+def heuristic(board, my_char, opp_char, win_length=None):
+    """
+    Description: Evaluates the current game board by assigning a score 
+    based on how favorable it is for the agent. It examines all possible 
+    win_length-cell windows (WIN_LENGTH by default; horizontal, vertical, and diagonal) and uses the window_evaluation 
+    function to assess each one. The scores are summed to produce a final value that guides 
+    the agent in choosing moves that maximize its chances of winning while minimizing the opponent’s 
+    opportunities. The windows are counted on a Bitboard with popcounts (see Bitboard.score),
+    and only the windows holding a piece are looked at, as an empty window scores 0.
+
+    Swan Pyae Sone Tun: 25% Designed and implemented first version of function with vertical win check
+    Rajiv Mohan: 75% Designed and implemented second version of function with horizontal, forward and backward diagonal win check
+    """
+    return Bitboard.from_board(board, win_length or WIN_LENGTH).score(my_char, opp_char)
+
+
+"""
+Bitboard Representation here
+"""
+# window_evaluation scores indexed by [my_count][opp_count], one table per win length
+# and set of weights
+_window_score_tables = {}
+
+# WindowIndex of every board size seen so far, keyed by (rows, cols, win length)
+_window_indexes = {}
+
+# run_steps of every win length seen so far
+_run_steps = {}
+
+
+def window_score_table(length=4):
+    """
+    Description: Tabulates window_evaluation for every possible (my_count, opp_count)
+    pair of a window of length cells, so the bitboard can score a window with two
+    popcounts and a lookup while giving exactly the same score as window_evaluation.
+    """
+    weights = window_weights()
+    key = (length,) + tuple(weights[name] for name in WEIGHT_NAMES)
+    if key not in _window_score_tables:
+        table = []
+        for my_count in range(length + 1):
+            row = []
+            for opp_count in range(length + 1):
+                if my_count + opp_count > length:
+                    row.append(0)
+                    continue
+                window = (['X'] * my_count + ['O'] * opp_count
+                          + [' '] * (length - my_count - opp_count))
+                row.append(window_evaluation(window, 'X', 'O'))
+            table.append(row)
+        _window_score_tables[key] = table
+    return _window_score_tables[key]
+
+
+def run_steps(length):
+    """
+    Description: Shifts, in units of a direction, that turn a mask into the starts of
+    its runs of length pieces: run &= run >> step * shift for each step. A run of k
+    pieces ANDed with itself shifted by up to k gives a run of k + step, so the
+    length is reached in about log2(length) steps ((1, 2) for four in a row).
+    """
+    if length not in _run_steps:
+        steps, covered = [], 1
+        while covered < length:
+            step = min(covered, length - covered)
+            steps.append(step)
+            covered += step
+        _run_steps[length] = tuple(steps)
+    return _run_steps[length]
+
+
+class WindowIndex(collections.namedtuple('WindowIndex',
+                                          'rows cols stride windows masks cell_windows length')):
+    """
+    Description: Immutable table of every window of length cells (horizontal, vertical
+    and both diagonals) of a rows x cols board, shared by evaluation, win checks and rules.
+    windows[i] lists the (row, col) board cells of window i, with row 0 at the top like
+    the game manager's board, and masks[i] is the same window as a Bitboard mask.
+    cell_windows[bit] lists the windows through the cell at a Bitboard bit index.
+    """
+    __slots__ = ()
+
+    def cell_bit(self, row, col):
+        """Bitboard bit index of board cell (row, col), with row 0 at the top."""
+        return col * self.stride + self.rows - 1 - row
+
+
+# Version of the table files in TABLE_CACHE_DIR, to be raised whenever what a table
+# holds changes; files of another version are built again
+TABLE_CACHE_VERSION = 1
+
+
+def cached_table(name, build):
+    """
+    Description: Returns the table saved as name in TABLE_CACHE_DIR, or calls build()
+    and saves its result there for the next process. Tables are plain lists, dicts
+    and ints saved as JSON, so loading a file can never run code, and they come back
+    with lists in place of tuples. A file of another TABLE_CACHE_VERSION or for another
+    name, or one that cannot be read, is built again, and a folder that cannot be
+    written to only costs the saving. A file is written next to its path and renamed
+    over it, so processes starting together never read half a table.
+    """
+    if TABLE_CACHE_DIR is None:
+        return build()
+    path = os.path.join(TABLE_CACHE_DIR, name + '.json')
+    try:
+        with open(path) as file:
+            saved = json.load(file)
+        if (isinstance(saved, dict) and saved.get('version') == TABLE_CACHE_VERSION
+                and saved.get('name') == name and 'table' in saved):
+            return saved['table']
+    except (OSError, ValueError):
+        pass
+    table = build()
+    try:
+        os.makedirs(TABLE_CACHE_DIR, exist_ok=True)
+        temporary = '%s.%d.tmp' % (path, os.getpid())
+        with open(temporary, 'w') as file:
+            json.dump({'version': TABLE_CACHE_VERSION, 'name': name, 'table': table}, file,
+                      separators=(',', ':'))
+        os.replace(temporary, path)
+    except OSError:
+        pass
+    return table
+
+
+def build_windows(rows, cols, length):
+    """The (windows, masks, cell_windows) fields of the WindowIndex of a rows x cols
+    board with windows of length cells."""
+    stride = rows + 1
+    windows, masks = [], []
+    cell_windows = [[] for _ in range(cols * stride)]
+    for col in range(cols):
+        for height in range(rows):
+            for d_col, d_height in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                end_col = col + (length - 1) * d_col
+                end_height = height + (length - 1) * d_height
+                if end_col >= cols or not 0 <= end_height < rows:
+                    continue
+                cells, mask = [], 0
+                for k in range(length):
+                    cell_col, cell_height = col + k * d_col, height + k * d_height
+                    cells.append((rows - 1 - cell_height, cell_col))
+                    mask |= 1 << (cell_col * stride + cell_height)
+                    cell_windows[cell_col * stride + cell_height].append(len(windows))
+                windows.append(tuple(cells))
+                masks.append(mask)
+    return tuple(windows), tuple(masks), tuple(tuple(indices) for indices in cell_windows)
+
+
+def window_index(rows, cols, length=4):
+    """Returns the WindowIndex of a rows x cols board with windows of length cells,
+    loading it from TABLE_CACHE_DIR or building it on first use."""
+    key = (rows, cols, length)
+    if key not in _window_indexes:
+        windows, masks, cell_windows = cached_table(
+            'windows_%dx%d_%d' % key, lambda: build_windows(rows, cols, length))
+        windows = tuple(tuple(tuple(cell) for cell in window) for window in windows)
+        cell_windows = tuple(tuple(indices) for indices in cell_windows)
+        _window_indexes[key] = WindowIndex(rows, cols, rows + 1, windows, tuple(masks),
+                                           cell_windows, length)
+    return _window_indexes[key]
+
+
+class Bitboard:
+    """
+    Description: Compact representation of a Connect 4 position. The pieces of each
+    player are one integer bitmask laid out column by column from the bottom, with an
+    extra empty bit on top of every column so that shifted masks never wrap from one
+    column into the next. heights[col] counts the pieces already in col, which makes
+    a drop a single bit operation. Bit (row, col) counts rows from the bottom, while
+    the list-of-lists board used by the game manager counts them from the top.
+    win_length is the number of pieces in a row that wins.
+    """
+    __slots__ = ('rows', 'cols', 'stride', 'masks', 'heights', 'win_length')
+
+    def __init__(self, rows, cols, win_length=4):
+        self.rows = rows
+        self.cols = cols
+        self.stride = rows + 1
+        self.masks = {'X': 0, 'O': 0}
+        self.heights = [0] * cols
+        self.win_length = win_length
+
+    @classmethod
+    def from_board(cls, board, win_length=4):
+        """Builds a Bitboard from a list-of-lists board of ' ', 'X' and 'O'."""
+        rows, cols = len(board), len(board[0])
+        position = cls(rows, cols, win_length)
+        masks = position.masks
+        for col in range(cols):
+            height = 0
+            for row in reversed(range(rows)):
+                symbol = board[row][col]
+                if symbol == ' ':
+                    break
+                masks[symbol] = masks.get(symbol, 0) | 1 << (col * position.stride + height)
+                height += 1
+            position.heights[col] = height
+        return position
+
+    def to_board(self):
+        """Returns the position as a list-of-lists board, top row first."""
+        board = [[' '] * self.cols for _ in range(self.rows)]
+        for symbol, mask in self.masks.items():
+            for col in range(self.cols):
+                for height in range(self.heights[col]):
+                    if mask >> (col * self.stride + height) & 1:
+                        board[self.rows - 1 - height][col] = symbol
+        return board
+
+    def copy(self):
+        position = Bitboard.__new__(Bitboard)
+        position.rows = self.rows
+        position.cols = self.cols
+        position.stride = self.stride
+        position.masks = dict(self.masks)
+        position.heights = self.heights[:]
+        position.win_length = self.win_length
+        return position
+
+    def can_play(self, col):
+        return self.heights[col] < self.rows
+
+    def valid_columns(self):
+        return [col for col in range(self.cols) if self.heights[col] < self.rows]
+
+    def candidate_columns(self):
+        """
+        Playable columns worth searching. On boards at least NEAR_PIECES_MIN_COLS wide
+        only the columns within win_length - 1 of a column holding a piece, since no
+        line through a farther cell reaches a piece, or every playable column if that
+        leaves none.
+        """
+        columns = self.valid_columns()
+        if self.cols < NEAR_PIECES_MIN_COLS:
+            return columns
+        reach = self.win_length - 1
+        near = [False] * self.cols
+        for col, height in enumerate(self.heights):
+            if height:
+                for other in range(max(0, col - reach), min(self.cols, col + reach + 1)):
+                    near[other] = True
+        return [col for col in columns if near[col]] or columns
+
+    def play(self, col, symbol):
+        """Drops symbol into col and returns the bit index of the cell it landed in."""
+        bit = col * self.stride + self.heights[col]
+        self.masks[symbol] = self.masks.get(symbol, 0) | 1 << bit
+        self.heights[col] += 1
+        return bit
+
+    def undo(self, col, symbol):
+        """Removes the top piece of col, which must belong to symbol."""
+        self.heights[col] -= 1
+        self.masks[symbol] ^= 1 << (col * self.stride + self.heights[col])
+
+    def is_full(self):
+        return all(height == self.rows for height in self.heights)
+
+    def is_win(self, symbol):
+        """Checks for win_length in a row of symbol by shifting its mask along each
+        direction (see run_steps): 1 is vertical, stride is horizontal and
+        stride - 1 / stride + 1 are the diagonals."""
+        mask = self.masks.get(symbol, 0)
+        steps = run_steps(self.win_length)
+        for shift in (1, self.stride, self.stride - 1, self.stride + 1):
+            run = mask
+            for step in steps:
+                run &= run >> step * shift
+            if run:
+                return True
+        return False
+
+    def score(self, my_char, opp_char):
+        """Same value as heuristic() on the equivalent board, using popcounts of the
+        windows through the occupied cells."""
+        table = window_score_table(self.win_length)
+        index = window_index(self.rows, self.cols, self.win_length)
+        mine = self.masks.get(my_char, 0)
+        theirs = self.masks.get(opp_char, 0)
+        score = 0
+        for i in occupied_windows(index, mine | theirs):
+            window = index.masks[i]
+            my_count = popcount(window & mine)
+            opp_count = popcount(window & theirs)
+            if my_count and opp_count:
+                continue
+            score += table[my_count][opp_count]
+        return score
+
+
+def occupied_windows(index, occupied):
+    """Indices of the windows of a WindowIndex holding at least one cell of occupied."""
+    windows = set()
+    cell_windows = index.cell_windows
+    while occupied:
+        low = occupied & -occupied
+        windows.update(cell_windows[low.bit_length() - 1])
+        occupied ^= low
+    return windows
+
+
+class EvaluationState:
+    """
+    Description: Running heuristic value of a position that is modified by making and
+    unmaking moves during a search. It keeps the number of my_char and opp_char pieces
+    in every WIN_LENGTH-cell window along with the total score, so a move only rescores the
+    windows through the cell it fills, and building it only counts the windows that
+    hold a piece. score always equals heuristic() on the board the position represents. key and mirror_key are the Zobrist keys of the position
+    and of its left-right mirror image, kept up to date in the same way.
+    """
+    __slots__ = ('position', 'my_char', 'opp_char', 'my_counts', 'opp_counts',
+                 'score', 'cell_windows', 'table', 'zobrist', 'key', 'mirror_key')
+
+    def __init__(self, position, my_char, opp_char):
+        self.position = position.copy()
+        self.my_char = my_char
+        self.opp_char = opp_char
+        self.table = table = window_score_table(position.win_length)
+        index = window_index(position.rows, position.cols, position.win_length)
+        self.cell_windows = index.cell_windows
+        mine = position.masks.get(my_char, 0)
+        theirs = position.masks.get(opp_char, 0)
+        masks = index.masks
+        self.my_counts = my_counts = [0] * len(masks)
+        self.opp_counts = opp_counts = [0] * len(masks)
+        score = 0
+        for i in occupied_windows(index, mine | theirs):
+            my_counts[i] = my_count = popcount(masks[i] & mine)
+            opp_counts[i] = opp_count = popcount(masks[i] & theirs)
+            score += table[my_count][opp_count]
+        self.score = score
+        self.zobrist = zobrist_keys(position.rows, position.cols)
+        self.key, self.mirror_key = self.zobrist.hash(position)
+
+    def play(self, col, symbol):
+        """Drops symbol into col and updates the windows through the new piece."""
+        bit = self.position.play(col, symbol)
+        table = self.table
+        my_counts, opp_counts = self.my_counts, self.opp_counts
+        delta = 0
+        if symbol == self.my_char:
+            for index in self.cell_windows[bit]:
+                my_count, opp_count = my_counts[index], opp_counts[index]
+                delta += table[my_count + 1][opp_count] - table[my_count][opp_count]
+                my_counts[index] = my_count + 1
+        else:
+            for index in self.cell_windows[bit]:
+                my_count, opp_count = my_counts[index], opp_counts[index]
+                delta += table[my_count][opp_count + 1] - table[my_count][opp_count]
+                opp_counts[index] = opp_count + 1
+        self.score += delta
+        keys, mirror_keys = self.zobrist.keys[symbol]
+        self.key ^= keys[bit]
+        self.mirror_key ^= mirror_keys[bit]
+        return bit
+
+    def undo(self, col, symbol):
+        """Takes back the last piece dropped into col, which must belong to symbol."""
+        self.position.undo(col, symbol)
+        bit = col * self.position.stride + self.position.heights[col]
+        table = self.table
+        my_counts, opp_counts = self.my_counts, self.opp_counts
+        delta = 0
+        if symbol == self.my_char:
+            for index in self.cell_windows[bit]:
+                my_count, opp_count = my_counts[index], opp_counts[index]
+                delta += table[my_count - 1][opp_count] - table[my_count][opp_count]
+                my_counts[index] = my_count - 1
+        else:
+            for index in self.cell_windows[bit]:
+                my_count, opp_count = my_counts[index], opp_counts[index]
+                delta += table[my_count][opp_count - 1] - table[my_count][opp_count]
+                opp_counts[index] = opp_count - 1
+        self.score += delta
+        keys, mirror_keys = self.zobrist.keys[symbol]
+        self.key ^= keys[bit]
+        self.mirror_key ^= mirror_keys[bit]
+
+    def keys_after(self, col, symbol):
+        """Returns (key, mirror_key) of the position after symbol is dropped into col,
+        without making the move."""
+        bit = col * self.position.stride + self.position.heights[col]
+        keys, mirror_keys = self.zobrist.keys[symbol]
+        return self.key ^ keys[bit], self.mirror_key ^ mirror_keys[bit]
+
+    def canonical_key(self):
+        """Key shared by the position and its mirror image."""
+        return min(self.key, self.mirror_key)
+
+
+"""
+Batch Evaluation here
+"""
+def boards_to_array(boards, my_char, opp_char):
+    """Converts list-of-lists boards to the (N, rows, cols) int8 array heuristic_batch
+    takes: 1 for my_char, -1 for opp_char and 0 for an empty cell."""
+    load_numpy()
+    array = np.zeros((len(boards), len(boards[0]), len(boards[0][0])), dtype=np.int8)
+    for n, board in enumerate(boards):
+        for row, cells in enumerate(board):
+            for col, cell in enumerate(cells):
+                if cell == my_char:
+                    array[n, row, col] = 1
+                elif cell == opp_char:
+                    array[n, row, col] = -1
+    return array
+
+
+def _window_counts_batch(boards, win_length):
+    """
+    Description: The number of my and opponent pieces in every window of win_length
+    cells of N boards given as for heuristic_batch, as two (N, windows) arrays. Each
+    direction's counts are summed from win_length shifted slices of the boards.
+    """
+    _, rows, cols = boards.shape
+    span = win_length - 1
+    mine = (boards == 1).astype(np.int8)
+    theirs = (boards == -1).astype(np.int8)
+    # (row slice, col slice) of cell k of every window, for each direction
+    directions = (
+        lambda k: (slice(0, rows), slice(k, cols - span + k)),                  # horizontal
+        lambda k: (slice(k, rows - span + k), slice(0, cols)),                  # vertical
+        lambda k: (slice(span - k, rows - k), slice(k, cols - span + k)),       # forward diagonal
+        lambda k: (slice(k, rows - span + k), slice(k, cols - span + k)),       # backward diagonal
+    )
+    my_counts, opp_counts = [], []
+    for cells in directions:
+        my_counts.append(sum(mine[(slice(None),) + cells(k)] for k in range(win_length))
+                         .reshape(len(boards), -1))
+        opp_counts.append(sum(theirs[(slice(None),) + cells(k)] for k in range(win_length))
+                          .reshape(len(boards), -1))
+    return np.concatenate(my_counts, axis=1), np.concatenate(opp_counts, axis=1)
+
+
+def heuristic_batch(boards, win_length=4):
+    """
+    Description: Vectorized heuristic for many positions at once. boards is an
+    (N, rows, cols) int8 array as made by boards_to_array, with row 0 at the top. Every
+    window is scored by looking its counts (see _window_counts_batch) up in the
+    window_evaluation table, so the N returned scores equal heuristic() on each board.
+    """
+    load_numpy()
+    boards = np.asarray(boards)
+    table = np.asarray(window_score_table(win_length), dtype=np.int64)
+    my_counts, opp_counts = _window_counts_batch(boards, win_length)
+    return table[my_counts, opp_counts].sum(axis=1)
+
+
+def window_features_batch(boards, win_length=4):
+    """
+    Description: Counts, for each of N boards given as for heuristic_batch, the windows
+    of every kind window_evaluation scores, as an (N, 6) int array with columns in
+    WEIGHT_NAMES order. heuristic() of a board is its row times the weight vector,
+    which makes the features suited to fitting the weights.
+    """
+    load_numpy()
+    boards = np.asarray(boards)
+    my_counts, opp_counts = _window_counts_batch(boards, win_length)
+    kinds = ((win_length, 0), (0, win_length), (win_length - 1, 0), (0, win_length - 1),
+             (win_length - 2, 0), (0, win_length - 2))
+    features = np.zeros((len(boards), len(kinds)), dtype=np.int64)
+    for column, (my_count, opp_count) in enumerate(kinds):
+        features[:, column] = ((my_counts == my_count) & (opp_counts == opp_count)).sum(axis=1)
+    return features
+
+
+def score_children(position, columns, my_char, opp_char):
+    """heuristic() of every position reached by my_char playing one of columns from a
+    Bitboard, computed with a single heuristic_batch call."""
+    load_numpy()
+    rows = position.rows
+    base = np.zeros((rows, position.cols), dtype=np.int8)
+    for symbol, value in ((my_char, 1), (opp_char, -1)):
+        mask = position.masks.get(symbol, 0)
+        for col in range(position.cols):
+            for height in range(position.heights[col]):
+                if mask >> (col * position.stride + height) & 1:
+                    base[rows - 1 - height, col] = value
+    children = np.repeat(base[np.newaxis], len(columns), axis=0)
+    for n, col in enumerate(columns):
+        children[n, rows - 1 - position.heights[col], col] = 1
+    return heuristic_batch(children, position.win_length).tolist()
+
+
+"""
+Transposition Table here
+"""
+# Kinds of score stored in the transposition table
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Zobrist keys, cached per (rows, cols)
+_zobrist_keys = {}
+
+
+class ZobristKeys:
+    """
+    Description: Random 64-bit key for every (symbol, cell) of a rows x cols board. The
+    key of a position is the XOR of the keys of its pieces, so a move updates it with a
+    single XOR. keys[symbol] holds the keys of each Bitboard bit and the keys of the
+    mirrored bit, so the key of the mirror image is maintained alongside. The generator
+    is seeded with the board size so that every process agrees on the keys, and the
+    keys are kept in TABLE_CACHE_DIR like the window indexes.
+    """
+    def __init__(self, rows, cols):
+        self.keys = cached_table('zobrist_%dx%d' % (rows, cols),
+                                 lambda: self.build_keys(rows, cols))
+
+    @staticmethod
+    def build_keys(rows, cols):
+        generator = random.Random("zobrist-%dx%d" % (rows, cols))
+        stride = rows + 1
+        keys_of = {}
+        for symbol in ('X', 'O'):
+            keys = [generator.getrandbits(64) for _ in range(cols * stride)]
+            mirror_keys = [keys[(cols - 1 - bit // stride) * stride + bit % stride]
+                           for bit in range(cols * stride)]
+            keys_of[symbol] = (keys, mirror_keys)
+        return keys_of
+
+    def hash(self, position):
+        """Returns (key, mirror_key) of a Bitboard."""
+        key = mirror_key = 0
+        for symbol, mask in position.masks.items():
+            keys, mirror_keys = self.keys[symbol]
+            while mask:
+                low = mask & -mask
+                bit = low.bit_length() - 1
+                key ^= keys[bit]
+                mirror_key ^= mirror_keys[bit]
+                mask ^= low
+        return key, mirror_key
+
+
+def zobrist_keys(rows, cols):
+    key = (rows, cols)
+    if key not in _zobrist_keys:
+        _zobrist_keys[key] = ZobristKeys(rows, cols)
+    return _zobrist_keys[key]
+
+
+class TranspositionTable:
+    """
+    Description: Fixed-size table of searched positions kept for a whole game. Each
+    slot holds (key, depth, score, flag, move, age) where depth is how many plies were
+    searched below the position (0 for a plain heuristic evaluation), score is the result
+    from the agent's point of view, flag tells whether score is EXACT or only a
+    LOWER_BOUND / UPPER_BOUND of it, and move is the best column found, or None. A position and its
+    mirror image share one entry under the smaller of their two keys, with move stored
+    for the orientation of that key. A slot is overwritten when it is empty, holds the
+    same position, was written by an earlier search (age), or was searched less deeply.
+    """
+    def __init__(self, rows, cols, size=None):
+        if size is None:
+            size = 1 << min(20, (rows * cols * 1024).bit_length())
+        self.cols = cols
+        self.size = size
+        self.entries = [None] * size
+        self.age = 0
+
+    def new_search(self):
+        """Marks the entries written so far as coming from an earlier search."""
+        self.age += 1
+
+    def probe(self, key, mirror_key):
+        """Returns (depth, score, flag, move) stored for the position, or None."""
+        mirrored = mirror_key < key
+        if mirrored:
+            key = mirror_key
+        entry = self.entries[key & (self.size - 1)]
+        if entry is None or entry[0] != key:
+            return None
+        move = entry[4]
+        if mirrored and move is not None:
+            move = self.cols - 1 - move
+        return entry[1], entry[2], entry[3], move
+
+    def store(self, key, mirror_key, depth, score, flag, move):
+        if mirror_key < key:
+            key = mirror_key
+            if move is not None:
+                move = self.cols - 1 - move
+        index = key & (self.size - 1)
+        entry = self.entries[index]
+        if (entry is None or entry[0] == key or entry[5] != self.age
+                or depth >= entry[1]):
+            self.entries[index] = (key, depth, score, flag, move, self.age)
+
+
+"""
+Instrumentation here
+"""
+class MoveStats:
+    """
+    Description: Counters for one call to what_is_your_move. It is only created when
+    INSTRUMENTATION_CALLBACK or INSTRUMENTATION_LOG is set; otherwise the agent only
+    pays for a few "is None" checks per search node expanded.
+    rule is the forward chaining rule that fired ('win', 'block', 'forced_win',
+    'only_move' or 'center'), threats the ThreatAnalysis summary when one was made, engine
+    the search used when none did ('endgame' or 'book' when the endgame solver or the
+    opening book decided), nodes the states expanded or searched, heap_peak
+    the largest a_star queue, tt_hits the results taken from the transposition table
+    and evaluation_seconds the time spent making and unmaking moves, which includes
+    the incremental heuristic (the work heuristic() and copy.deepcopy used to do).
+    """
+    __slots__ = ('start', 'rule', 'threats', 'engine', 'nodes', 'heap_peak', 'tt_hits',
+                 'evaluation_seconds')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.rule = None
+        self.threats = None
+        self.engine = None
+        self.nodes = 0
+        self.heap_peak = 0
+        self.tt_hits = 0
+        self.evaluation_seconds = 0.0
+
+
+class TimedEvaluationState(EvaluationState):
+    """EvaluationState that adds up the time spent in play and undo, used in place of
+    EvaluationState while instrumentation is on."""
+    __slots__ = ('seconds',)
+
+    def __init__(self, position, my_char, opp_char):
+        EvaluationState.__init__(self, position, my_char, opp_char)
+        self.seconds = 0.0
+
+    def play(self, col, symbol):
+        start = time.perf_counter()
+        bit = EvaluationState.play(self, col, symbol)
+        self.seconds += time.perf_counter() - start
+        return bit
+
+    def undo(self, col, symbol):
+        start = time.perf_counter()
+        EvaluationState.undo(self, col, symbol)
+        self.seconds += time.perf_counter() - start
+
+
+def report_move(context, board, move):
+    """Turns the MoveStats of the move just decided into a record and hands it to
+    INSTRUMENTATION_CALLBACK and/or appends it to the INSTRUMENTATION_LOG file."""
+    stats = context.stats
+    record = {
+        'time': time.time(),
+        'agent': AGENT_NAME,
+        'player': context.player_symbol,
+        'rows': context.rows,
+        'cols': context.cols,
+        'pieces': sum(cell != ' ' for row in board for cell in row),
+        'move': move,
+        'seconds': time.perf_counter() - stats.start,
+        'rule': stats.rule,
+        'threats': stats.threats,
+        'engine': stats.engine,
+        'nodes': stats.nodes,
+        'heap_peak': stats.heap_peak,
+        'tt_hits': stats.tt_hits,
+        'evaluation_seconds': stats.evaluation_seconds,
+        'search': context.last_search,
+    }
+    if INSTRUMENTATION_CALLBACK is not None:
+        INSTRUMENTATION_CALLBACK(record)
+    if INSTRUMENTATION_LOG:
+        path = INSTRUMENTATION_LOG if isinstance(INSTRUMENTATION_LOG, str) else AGENT_NAME + "_Stats.jsonl"
+        with open(path, 'a') as log:
+            log.write(json.dumps(record) + "\n")
+
+
+def connect_4_result(board, winner, looser):
+    """The Connect 4 manager calls this function when the game is over.
+    If there is a winner, the team name of the winner and looser are the
+    values of the respective argument variables. If there is a draw/tie,
+    the values of winner = looser = 'Draw'."""
+
+    # The game is over, so release what init_agent set up for it
+    while _game_contexts:
+        _game_contexts.popitem()[1].close()
+
+    # Check if a draw
+    if winner == "Draw":
+        print(">>> I am player TEAM1 <<<")
+        print(">>> The game resulted in a draw. <<<\n")
+        return True
+
+    print(">>> I am player TEAM1 <<<")
+    print("The winner is " + winner)
+    if winner == "Team1":
+        print("YEAH!!  :-)")
+    else:
+        print("BOO HOO HOO  :~(")
+    print("The looser is " + looser)
+    print()
+
+    print("The final board is") # Uncomment if you want to print the game board.
+    #print(board)  # Uncomment if you want to print the game board.
+
+    # Insert your code HERE to do whatever you like with the arguments.
+    return True
+
+
+#####
+# MAKE SURE MODULE IS IMPORTED
+if __name__ == "__main__":
+   print("connect_4_engine.py  is intended to be imported and not executed.")
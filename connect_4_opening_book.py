@@ -0,0 +1,150 @@
+#! /usr/bin/connect_4_opening_book.py
+
+"""
+Offline generator of the opening books the agent plays its first moves from.
+
+Every position reachable in at most --plies moves on each board size is searched
+by the agent's own alpha-beta search, --depth plies deep, across a process pool.
+A position and its mirror image are searched once. The best column of each is
+written to books/opening_<rows>x<cols>.bin, a header followed by fixed-size
+records sorted by the position's canonical Zobrist key (the format is described
+next to OpeningBook in the agent), which the agent binary searches through mmap.
+
+    python connect_4_opening_book.py --rows 6 --cols 7 --plies 4 --depth 10 --workers 8
+
+--win-length builds books for connect-N games, kept in files of their own.
+"""
+
+# IMPORTS
+import argparse
+import concurrent.futures
+import itertools
+import os
+import time
+
+from connect_4_tournament import configure_agent, load_agent, other, quiet
+
+# Settings of the agent while it searches book positions: a plain serial search, and
+# no book, so a position is never answered from an older version of the book
+SEARCH_SETTINGS = {'SEARCH_WORKERS': 1, 'PONDER': False, 'OPENING_BOOK': False,
+                   'INSTRUMENTATION_CALLBACK': None, 'INSTRUMENTATION_LOG': None}
+
+
+# HELPER FUNCTIONS
+def book_positions(agent, rows, cols, win_length, plies):
+    """
+    Description: Walks the game tree plies moves deep and returns one Bitboard per
+    distinct position, a position and its mirror image counting as one. Positions
+    where the game is already over are left out.
+    """
+    zobrist = agent.zobrist_keys(rows, cols)
+    level = [agent.Bitboard(rows, cols, win_length)]
+    positions = list(level)
+    seen = {min(zobrist.hash(level[0]))}
+    for ply in range(plies):
+        symbol = 'X' if ply % 2 == 0 else 'O'
+        next_level = []
+        for position in level:
+            for col in position.valid_columns():
+                child = position.copy()
+                child.play(col, symbol)
+                key = min(zobrist.hash(child))
+                if key in seen or child.is_win(symbol) or child.is_full():
+                    continue
+                seen.add(key)
+                next_level.append(child)
+        positions.extend(next_level)
+        level = next_level
+    return positions
+
+
+def search_position(task):
+    """
+    Description: Runs in a generator worker process. Searches one book position with
+    the agent's alpha_beta and returns its record as (key, column, depth), with the
+    key and column in the canonical orientation the book stores.
+    """
+    agent = load_agent(task['agent'])
+    configure_agent(agent, dict(SEARCH_SETTINGS, WIN_LENGTH=task['win_length']))
+    rows, cols = task['rows'], task['cols']
+    position = agent.Bitboard(rows, cols, task['win_length'])
+    position.masks = dict(task['masks'])
+    position.heights = list(task['heights'])
+    symbol = 'X' if sum(position.heights) % 2 == 0 else 'O'
+    board = position.to_board()
+    with quiet():
+        agent.init_agent(symbol, rows, cols, [row[:] for row in board])
+        column = agent.alpha_beta(board, rows, cols, symbol, other(symbol),
+                                  time_limit=task['time_limit'], max_depth=task['depth']) - 1
+        search = agent.last_search_info(symbol)
+        agent.connect_4_result(board, 'Draw', 'Draw')
+    depth = search['depth']
+    if abs(search['score']) >= agent.WIN_SCORE or depth >= rows * cols - sum(position.heights):
+        depth = agent.BOOK_SOLVED
+    key, mirror_key = agent.zobrist_keys(rows, cols).hash(position)
+    if mirror_key < key:
+        key, column = mirror_key, cols - 1 - column
+    return key, column, min(depth, agent.BOOK_SOLVED)
+
+
+def write_book(agent, path, rows, cols, win_length, plies, records):
+    """Writes records, (key, column, depth) tuples, as a book file, sorted by key. The
+    file is written next to path and renamed over it, so a running agent never maps a
+    half-written book."""
+    records = sorted(records)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(agent.BOOK_HEADER.pack(agent.BOOK_MAGIC, agent.BOOK_VERSION, rows, cols,
+                                          win_length, plies, len(records)))
+        for record in records:
+            file.write(agent.BOOK_RECORD.pack(*record))
+    os.replace(temporary, path)
+
+
+def build_book(spec, rows, cols, plies, depth, time_limit, output_dir=None, workers=None,
+               win_length=4):
+    """Searches every book position of a rows x cols board and writes the book. Returns
+    the path of the book and the number of positions in it."""
+    agent = load_agent(spec)
+    positions = book_positions(agent, rows, cols, win_length, plies)
+    tasks = [{'agent': spec, 'rows': rows, 'cols': cols, 'win_length': win_length,
+              'masks': position.masks, 'heights': position.heights, 'depth': depth,
+              'time_limit': time_limit}
+             for position in positions]
+    if workers == 1:
+        records = [search_position(task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(search_position, tasks))
+    path = agent.opening_book_path(rows, cols, win_length, output_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_book(agent, path, rows, cols, win_length, plies, records)
+    return path, len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build Connect 4 opening books.")
+    parser.add_argument('--agent', default='Team1_Connect_4_Agent',
+                        help="module name or .py file of the agent whose search fills the book")
+    parser.add_argument('--rows', type=int, nargs='+', default=[6])
+    parser.add_argument('--cols', type=int, nargs='+', default=[7],
+                        help="a book is built for every combination of --rows and --cols")
+    parser.add_argument('--win-length', type=int, default=4, help="pieces in a row that win")
+    parser.add_argument('--plies', type=int, default=4, help="moves into the game the book covers")
+    parser.add_argument('--depth', type=int, default=10, help="search depth of every position")
+    parser.add_argument('--time', type=float, default=60.0,
+                        help="most seconds spent on one position")
+    parser.add_argument('--output-dir', help="folder of the books (default: the agent's)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    for rows, cols in itertools.product(args.rows, args.cols):
+        start = time.perf_counter()
+        path, count = build_book(args.agent, rows, cols, args.plies, args.depth, args.time,
+                                 args.output_dir, args.workers, args.win_length)
+        print("%dx%d: %d positions written to %s in %.1f s"
+              % (rows, cols, count, path, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#! /usr/bin/connect_4_records.py
+
+"""
+Compact binary record of played Connect 4 games.
+
+A record file starts with a 5-byte file header (b'C4GR' and the format version)
+and then holds one record per game, appended as games finish:
+
+    rows, cols, win length, outcome      1 byte each
+    seed                                 8 bytes
+    number of moves                      2 bytes
+    length of each player's name         1 byte each
+    the two player names                 UTF-8, 'X' (first mover) then 'O'
+    the moves                            1 byte each, the 0-based column
+
+The outcome is 0 for a draw, 1 when 'X' won and 2 when 'O' won, plus FORFEIT
+when the loser made an illegal move. A 6x7 game takes about 40 bytes, against
+one text line per move and per result for the game manager's files.
+
+GameRecordWriter appends through a large buffer, and read_games streams the
+records back one at a time, so files of millions of games are never loaded
+whole. replay yields the positions of one game lazily.
+
+    python connect_4_records.py tournament_games.c4r
+"""
+
+# IMPORTS
+import argparse
+import collections
+import os
+import struct
+
+FILE_MAGIC = b'C4GR'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<4sB')  # magic, version
+GAME_HEADER = struct.Struct('<BBBBQHBB')  # rows, cols, win length, outcome, seed, moves, name lengths
+
+DRAW, X_WON, O_WON = 0, 1, 2
+FORFEIT = 0x10
+
+# Bytes buffered by a writer before they are written to the file
+WRITE_BUFFER = 1 << 20
+
+
+class GameRecord(collections.namedtuple('GameRecord',
+                                        'rows cols win_length players seed winner forfeit moves')):
+    """
+    Description: One game of a record file. players are the names of 'X' and 'O',
+    winner is 0 when 'X' won, 1 when 'O' won and None for a draw (the same as
+    play_game returns), and moves is a bytes object of 0-based columns.
+    """
+    __slots__ = ()
+
+
+class GameRecordWriter:
+    """
+    Description: Appends games to a record file through a WRITE_BUFFER-byte buffer,
+    writing the file header first if the file is new. Use it as a context manager,
+    or call close(), so the last games are flushed.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'ab', buffering=WRITE_BUFFER)
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION))
+        self.games = 0
+
+    def write_game(self, rows, cols, players, seed, moves, winner, forfeit=False, win_length=4):
+        """Appends one game, with the arguments as described for GameRecord."""
+        # at most 255 bytes, cut on a character boundary so the name still decodes
+        names = [name.encode('utf-8')[:255].decode('utf-8', 'ignore').encode('utf-8')
+                 for name in players]
+        outcome = DRAW if winner is None else (X_WON if winner == 0 else O_WON)
+        if forfeit:
+            outcome |= FORFEIT
+        self.file.write(GAME_HEADER.pack(rows, cols, win_length, outcome,
+                                         (seed or 0) & 0xFFFFFFFFFFFFFFFF, len(moves),
+                                         len(names[0]), len(names[1])))
+        self.file.write(names[0])
+        self.file.write(names[1])
+        self.file.write(bytes(moves))
+        self.games += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_games(path):
+    """
+    Description: Yields the GameRecord of every game in a record file, in the order
+    they were written, reading the file in buffered chunks. A record cut short at the
+    end of the file (a writer that did not close) is left out.
+    """
+    with open(path, 'rb') as file:
+        magic, version = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ValueError("%s is not a version %d game record file" % (path, FILE_VERSION))
+        while True:
+            header = file.read(GAME_HEADER.size)
+            if len(header) < GAME_HEADER.size:
+                return
+            rows, cols, win_length, outcome, seed, count, x_length, o_length = \
+                GAME_HEADER.unpack(header)
+            body = file.read(x_length + o_length + count)
+            if len(body) < x_length + o_length + count:
+                return
+            players = (body[:x_length].decode('utf-8', 'replace'),
+                       body[x_length:x_length + o_length].decode('utf-8', 'replace'))
+            result = outcome & ~FORFEIT
+            winner = None if result == DRAW else (0 if result == X_WON else 1)
+            yield GameRecord(rows, cols, win_length, players, seed, winner,
+                             bool(outcome & FORFEIT), body[x_length + o_length:])
+
+
+def replay(record):
+    """
+    Description: Yields (board, symbol, column) before every move of a game: the
+    position as a list-of-lists board, top row first, the symbol about to move and
+    the 0-based column it plays. The same board object is updated in place between
+    steps, so copy it to keep a position.
+    """
+    board = [[' '] * record.cols for _ in range(record.rows)]
+    heights = [0] * record.cols
+    symbol = 'X'
+    for col in record.moves:
+        yield board, symbol, col
+        board[record.rows - 1 - heights[col]][col] = symbol
+        heights[col] += 1
+        symbol = 'O' if symbol == 'X' else 'X'
+
+
+def summarize(paths):
+    """Totals the games of record files per board size and player pairing."""
+    totals = {}
+    for path in paths:
+        for record in read_games(path):
+            key = ('%dx%d' % (record.rows, record.cols), record.players)
+            total = totals.setdefault(key, {'games': 0, 'x_wins': 0, 'o_wins': 0,
+                                            'draws': 0, 'forfeits': 0, 'moves': 0})
+            total['games'] += 1
+            total['moves'] += len(record.moves)
+            total['forfeits'] += record.forfeit
+            if record.winner is None:
+                total['draws'] += 1
+            else:
+                total['x_wins' if record.winner == 0 else 'o_wins'] += 1
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize Connect 4 game record files.")
+    parser.add_argument('records', nargs='+', help="game record files")
+    args = parser.parse_args(argv)
+
+    for (size, (x_name, o_name)), total in sorted(summarize(args.records).items()):
+        print("%-7s X=%s O=%s: %d games, X %d, O %d, draws %d, forfeits %d, %.1f moves/game"
+              % (size, x_name, o_name, total['games'], total['x_wins'], total['o_wins'],
+                 total['draws'], total['forfeits'], total['moves'] / total['games']))
+    print("%d bytes in %d files" % (sum(os.path.getsize(path) for path in args.records),
+                                   len(args.records)))
+
+
+if __name__ == "__main__":
+    main()
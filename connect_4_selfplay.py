@@ -0,0 +1,197 @@
+#! /usr/bin/connect_4_selfplay.py
+
+"""
+Self-play pipeline that tunes the window_evaluation weights of an agent.
+
+Every round plays --games games of the agent against itself across a process
+pool, all with the round's weight vector, at a short --move-time so that games
+are cheap. Every position of every game goes into a training buffer of the last
+--buffer positions: the window counts of window_features_batch, seen from the
+side to move, and the result of the game for that side (1 win, 0.5 draw, 0 loss).
+Games stream into the buffer as they finish.
+
+At the end of a round a logistic regression of the result on the four
+"one short" and "two short" window counts is fitted to the whole buffer with
+Newton's method. Its coefficients, rescaled to the size of the current weights,
+become the next round's weights. The win weights are kept, since a finished
+window ends the game rather than predicting its result. The weights are written
+to --output after every round, in the JSON format the agent reads through
+WEIGHTS_FILE.
+
+    python connect_4_selfplay.py --rounds 5 --games 2000 --workers 8 --output weights.json
+
+Needs numpy.
+"""
+
+# IMPORTS
+import argparse
+import concurrent.futures
+import json
+import random
+import time
+
+import numpy as np
+
+from connect_4_records import GameRecord, replay
+from connect_4_tournament import configure_agent, load_agent, play_game, quiet
+
+# Weights the regression fits, the others are carried over from the start weights
+FITTED_WEIGHTS = ('three', 'opp_three', 'two', 'opp_two')
+
+
+# HELPER FUNCTIONS
+def play_selfplay_game(task):
+    """
+    Description: Runs in a self-play worker process. Plays one game of the agent
+    against itself with the task's weights and settings, and returns the features
+    (window_features_batch from the side to move) and results of all its positions.
+    """
+    agent = load_agent(task['agent'])
+    configure_agent(agent, dict(task['settings'], WINDOW_WEIGHTS=task['weights'],
+                                WEIGHTS_FILE=None))
+    rows, cols = task['rows'], task['cols']
+    with quiet():
+        winner, moves, _ = play_game(agent, agent, rows, cols, task['opening_plies'],
+                                     task['seed'], win_length=task['win_length'])
+    record = GameRecord(rows, cols, task['win_length'], ('X', 'O'), task['seed'], winner,
+                        False, bytes(moves))
+    boards = np.zeros((len(moves), rows, cols), dtype=np.int8)
+    results = np.full(len(moves), 0.5)
+    for ply, (board, symbol, _) in enumerate(replay(record)):
+        for row, cells in enumerate(board):
+            for col, cell in enumerate(cells):
+                if cell != ' ':
+                    boards[ply, row, col] = 1 if cell == symbol else -1
+        if winner is not None:
+            results[ply] = 1.0 if winner == ply % 2 else 0.0
+    return agent.window_features_batch(boards, task['win_length']), results
+
+
+class TrainingBuffer:
+    """Ring buffer of the features and results of the last capacity positions."""
+    def __init__(self, capacity, width):
+        self.features = np.zeros((capacity, width), dtype=np.int32)
+        self.results = np.zeros(capacity)
+        self.capacity = capacity
+        self.next = 0
+        self.size = 0
+
+    def add(self, features, results):
+        for start in range(0, len(results), self.capacity):
+            chunk = slice(start, start + self.capacity)
+            count = len(results[chunk])
+            index = (self.next + np.arange(count)) % self.capacity
+            self.features[index] = features[chunk]
+            self.results[index] = results[chunk]
+            self.next = (self.next + count) % self.capacity
+            self.size = min(self.capacity, self.size + count)
+
+    def data(self):
+        return self.features[:self.size], self.results[:self.size]
+
+
+def fit_logistic(features, results, ridge=1e-3, iterations=25):
+    """
+    Description: Fits P(result) = sigmoid(features . w + bias) by Newton's method on
+    the whole batch at once and returns w. Results may be 0, 0.5 or 1; a small ridge
+    term keeps the Hessian invertible when a kind of window never occurs.
+    """
+    x = np.hstack([features.astype(np.float64), np.ones((len(features), 1))])
+    w = np.zeros(x.shape[1])
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-np.clip(x @ w, -30, 30)))
+        gradient = x.T @ (p - results) + ridge * w
+        hessian = (x * (p * (1 - p))[:, None]).T @ x + ridge * np.eye(len(w))
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return w[:-1]
+
+
+def fitted_weights(weights, features, results, names):
+    """The next weights: the regression coefficients of the FITTED_WEIGHTS windows,
+    scaled so their absolute values add up to the same total as in weights."""
+    columns = [names.index(name) for name in FITTED_WEIGHTS]
+    coefficients = fit_logistic(features[:, columns], results)
+    total = sum(abs(weights[name]) for name in FITTED_WEIGHTS)
+    scale = total / max(np.abs(coefficients).sum(), 1e-12)
+    new_weights = dict(weights)
+    for name, coefficient in zip(FITTED_WEIGHTS, coefficients):
+        new_weights[name] = int(round(coefficient * scale))
+    return new_weights
+
+
+def run_round(pool, tasks, buffer):
+    """Plays tasks on pool, adding each game's positions to buffer as it finishes, and
+    returns the number of positions added."""
+    positions = 0
+    if pool is None:
+        results = map(play_selfplay_game, tasks)
+    else:
+        results = pool.map(play_selfplay_game, tasks, chunksize=max(1, len(tasks) // 64))
+    for features, outcomes in results:
+        buffer.add(features, outcomes)
+        positions += len(outcomes)
+    return positions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune window_evaluation weights by self-play.")
+    parser.add_argument('--agent', default='Team1_Connect_4_Agent',
+                        help="module name or .py file of the agent")
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--games', type=int, default=500, help="games per round")
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--cols', type=int, default=7)
+    parser.add_argument('--win-length', type=int, default=4)
+    parser.add_argument('--opening-plies', type=int, default=4,
+                        help="random moves played before the agent takes over")
+    parser.add_argument('--move-time', type=float, default=0.01,
+                        help="MOVE_TIME_LIMIT of the agent during self-play")
+    parser.add_argument('--buffer', type=int, default=1000000, help="positions kept for fitting")
+    parser.add_argument('--weights', help="JSON weights file to start from")
+    parser.add_argument('--output', default='weights.json')
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    agent = load_agent(args.agent)
+    names = list(agent.WEIGHT_NAMES)
+    weights = dict(agent.WINDOW_WEIGHTS)
+    if args.weights:
+        with open(args.weights) as file:
+            weights.update(json.load(file)['weights'])
+    settings = {'MOVE_TIME_LIMIT': args.move_time, 'WIN_LENGTH': args.win_length,
+                'SEARCH_WORKERS': 1, 'PONDER': False, 'OPENING_BOOK': False}
+    buffer = TrainingBuffer(args.buffer, len(names))
+    generator = random.Random(args.seed)
+    pool = None
+    if args.workers != 1:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=args.workers)
+    try:
+        for round_number in range(1, args.rounds + 1):
+            tasks = [{'agent': args.agent, 'rows': args.rows, 'cols': args.cols,
+                      'win_length': args.win_length, 'opening_plies': args.opening_plies,
+                      'seed': generator.getrandbits(32), 'weights': weights,
+                      'settings': settings}
+                     for _ in range(args.games)]
+            start = time.perf_counter()
+            positions = run_round(pool, tasks, buffer)
+            elapsed = time.perf_counter() - start
+            weights = fitted_weights(weights, *buffer.data(), names)
+            with open(args.output, 'w') as file:
+                json.dump({'weights': weights, 'round': round_number,
+                           'positions': int(buffer.size), 'agent': args.agent,
+                           'rows': args.rows, 'cols': args.cols,
+                           'win_length': args.win_length}, file, indent=1)
+            print("round %d: %d positions in %.1f s (%.0f positions/hour), buffer %d, weights %s"
+                  % (round_number, positions, elapsed, positions / elapsed * 3600, buffer.size,
+                     {name: weights[name] for name in FITTED_WEIGHTS}))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+#! /usr/bin/connect_4_server.py
+
+"""
+Asyncio Connect 4 server where many people play agent modules at the same time.
+
+Every connection plays one game at a time against an agent, over a local TCP or
+Unix socket, with one JSON object per line in both directions:
+
+    -> {"type": "new", "agent": "Team1_Connect_4_Agent", "rows": 6, "cols": 7,
+        "first": "human"}
+    <- {"type": "board", "game": 1, "board": ["       ", ...], "to_move": "X",
+        "you": "X", "last_move": null}
+    -> {"type": "move", "column": 4}
+    <- {"type": "board", ...} after each move, then
+    <- {"type": "over", "game": 1, "winner": "agent", "reason": "4 in a row", ...}
+
+Columns are 1-based, as in the game manager. "first" may be "human", "agent" or
+"random", and "win_length" plays connect-N. Problems are answered with
+{"type": "error", "message": ...} and the game carries on.
+
+Agent moves run in a pool of worker processes. Each game is pinned to one
+worker, which keeps the game's agent state (its AgentSession, or init_agent for
+agents without one) from move to move, and a worker takes at most
+--games-per-worker games, new games being turned away while every worker is full.
+A worker runs one move at a time, and the --move-deadline seconds an agent has
+for a move start when its worker starts on it, so waiting behind other games'
+moves does not count. A worker whose move runs past the deadline is killed and
+replaced, and the agents of its other games are set up again from their boards.
+A move not made within the deadline, by the agent or by the human
+(--human-deadline), loses the game.
+
+    python connect_4_server.py --port 4000 --workers 8
+    python connect_4_server.py --unix /tmp/connect4.sock --agents Team1_Connect_4_Agent
+"""
+
+# IMPORTS
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import random
+import signal
+
+from connect_4_tournament import (check_win, configure_agent, drop_piece, load_agent, other,
+                                  parse_setting, quiet)
+
+# Agents offered when --agents is not given
+DEFAULT_AGENTS = ('Team1_Connect_4_Agent', 'Team2_Connect_4_Agent')
+
+# Settings every agent gets in the workers, on top of --set: many games share one
+# process, so an agent must not start processes of its own for each of them
+WORKER_SETTINGS = {'SEARCH_WORKERS': 1, 'PONDER': False}
+
+# Largest board a client may ask for
+MAX_ROWS = MAX_COLS = 32
+
+# Share of the move deadline an agent's MOVE_TIME_LIMIT may use, the rest is left for
+# handing the board to the worker and the move back
+DEADLINE_SHARE = 0.8
+
+
+# HELPER FUNCTIONS
+"""
+Worker Processes here
+"""
+# (session, agent module, win length) of every game pinned to this worker process,
+# keyed by game id
+_sessions = {}
+
+# Settings given to the agents of this worker process
+_worker_settings = {}
+
+
+class StatelessSession:
+    """Session for an agent module without AgentSession: init_agent once, then plain
+    what_is_your_move calls, which is all the game manager does either."""
+    def __init__(self, module, player_symbol, rows, cols, board):
+        self.module = module
+        self.player_symbol = player_symbol
+        self.rows = rows
+        self.cols = cols
+        module.init_agent(player_symbol, rows, cols, board)
+
+    def move(self, board):
+        return self.module.what_is_your_move(board, self.rows, self.cols, self.player_symbol)
+
+    def close(self):
+        pass
+
+
+def worker_init(settings):
+    """Runs once in every worker process."""
+    _worker_settings.update(WORKER_SETTINGS)
+    _worker_settings.update(settings)
+
+
+def worker_start(game_id, spec, symbol, rows, cols, board, win_length):
+    """Sets up the agent of a new game in this worker process."""
+    module = load_agent(spec)
+    configure_agent(module, dict(_worker_settings, WIN_LENGTH=win_length))
+    with quiet():
+        if hasattr(module, 'AgentSession'):
+            session = module.AgentSession(symbol, rows, cols, board)
+        else:
+            session = StatelessSession(module, symbol, rows, cols, board)
+    _sessions[game_id] = (session, module, win_length)
+
+
+def worker_move(game_id, board, deadline, setup):
+    """Asks the agent of a game for its move and returns the 1-based column. The agent's
+    MOVE_TIME_LIMIT is capped so that it answers well within deadline seconds. An agent
+    this process does not have, as after the worker was replaced, is first set up from
+    board with setup, the (spec, symbol, rows, cols, win_length) of its game."""
+    if game_id not in _sessions:
+        spec, symbol, rows, cols, win_length = setup
+        worker_start(game_id, spec, symbol, rows, cols, board, win_length)
+    session, module, win_length = _sessions[game_id]
+    time_limit = _worker_settings.get('MOVE_TIME_LIMIT',
+                                      getattr(module, 'MOVE_TIME_LIMIT', None))
+    if time_limit is not None:
+        time_limit = min(time_limit, deadline * DEADLINE_SHARE)
+    # games of other win lengths may share the worker
+    configure_agent(module, {'WIN_LENGTH': win_length, 'MOVE_TIME_LIMIT': time_limit})
+    with quiet():
+        return session.move(board)
+
+
+def worker_end(game_id):
+    """Forgets a finished game."""
+    if game_id in _sessions:
+        _sessions.pop(game_id)[0].close()
+
+
+class Worker:
+    """
+    Description: One worker process of the server, as a single-process executor, with
+    the games pinned to it. run() lets one call at a time reach the process, so a
+    call's timeout starts when the process starts on it, and kills and replaces the
+    process when the call overruns, since a running call cannot be cancelled.
+    """
+    def __init__(self, settings):
+        self.settings = settings
+        # games pinned to this worker
+        self.games = set()
+        # made on first use, inside the server's event loop
+        self.lock = None
+        self.start()
+
+    def start(self):
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, initializer=worker_init, initargs=(self.settings,))
+        self.pid = None
+
+    async def run(self, function, *args, timeout=None):
+        """Runs function(*args) in the worker process, raising asyncio.TimeoutError if
+        it takes more than timeout seconds once started."""
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            if self.pid is None:
+                self.pid = await loop.run_in_executor(self.executor, os.getpid)
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, function, *args), timeout)
+            except asyncio.TimeoutError:
+                self.restart()
+                raise
+
+    def restart(self):
+        """Kills the worker process and starts a new one, with no agents set up."""
+        try:
+            os.kill(self.pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        except OSError:
+            pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+"""
+Games here
+"""
+class GameSession:
+    """
+    Description: One game between a connected client and an agent. It holds the
+    board and whose turn it is, and the Worker of the server's pool that keeps the
+    agent's state for this game, in place of the module-level state init_agent sets
+    up for the game manager's single game.
+    """
+    def __init__(self, game_id, spec, rows, cols, win_length, human, worker):
+        self.game_id = game_id
+        self.spec = spec
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.human = human
+        self.agent = other(human)
+        self.worker = worker
+        self.board = [[' '] * cols for _ in range(rows)]
+        self.to_move = 'X'
+        self.moves = []
+        self.winner = None
+        self.reason = None
+        self.over = False
+
+    def legal(self, col):
+        return isinstance(col, int) and 0 <= col < self.cols and self.board[0][col] == ' '
+
+    def play(self, col):
+        """Plays 0-based col for the side to move and ends the game if it won or the
+        board is full."""
+        symbol = self.to_move
+        drop_piece(self.board, col, symbol)
+        self.moves.append(col)
+        if check_win(self.board, symbol, self.win_length):
+            self.finish(symbol, "%d in a row" % self.win_length)
+        elif len(self.moves) == self.rows * self.cols:
+            self.finish(None, "board full")
+        self.to_move = other(symbol)
+
+    def finish(self, winner, reason):
+        self.over = True
+        self.winner = winner
+        self.reason = reason
+
+    def board_message(self):
+        return {'type': 'board', 'game': self.game_id,
+                'board': [''.join(row) for row in self.board], 'to_move': self.to_move,
+                'you': self.human, 'last_move': self.moves[-1] + 1 if self.moves else None}
+
+    def over_message(self):
+        if self.winner is None:
+            winner = 'draw'
+        else:
+            winner = 'human' if self.winner == self.human else 'agent'
+        return {'type': 'over', 'game': self.game_id, 'winner': winner, 'reason': self.reason,
+                'moves': [col + 1 for col in self.moves],
+                'board': [''.join(row) for row in self.board]}
+
+
+class MatchServer:
+    """
+    Description: Accepts connections and plays their games. Agent moves go to a pool
+    of Workers, and every game stays on the worker with the fewest games when it
+    started, up to games_per_worker games a worker. The event loop itself only
+    parses messages and checks wins, so it can keep hundreds of games going.
+    """
+    def __init__(self, agents, workers=None, move_deadline=5.0, human_deadline=300.0,
+                 settings=None, games_per_worker=4):
+        self.agents = set(agents)
+        self.move_deadline = move_deadline
+        self.human_deadline = human_deadline
+        self.games_per_worker = games_per_worker
+        count = workers or os.cpu_count() or 1
+        self.workers = [Worker(settings or {}) for _ in range(count)]
+        self.game_ids = itertools.count(1)
+        self.games = {}
+        # worker_end calls still running, kept so they are not garbage collected
+        self.endings = set()
+
+    async def handle(self, reader, writer):
+        """Serves one connection until it closes."""
+        game = None
+
+        async def send(message):
+            writer.write((json.dumps(message) + "\n").encode())
+            await writer.drain()
+
+        try:
+            while True:
+                timeout = self.human_deadline if game is not None and not game.over else None
+                try:
+                    line = await asyncio.wait_for(reader.readline(), timeout)
+                except asyncio.TimeoutError:
+                    game.finish(game.agent, "human move deadline")
+                    await self.end_game(game, send)
+                    continue
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    kind = message['type']
+                except (ValueError, KeyError, TypeError):
+                    await send({'type': 'error', 'message': "expected a JSON object with a type"})
+                    continue
+                if kind == 'new':
+                    if game is not None and not game.over:
+                        game.finish(game.agent, "abandoned")
+                        await self.end_game(game, send)
+                    game = await self.new_game(message, send)
+                elif kind == 'move':
+                    if game is None or game.over:
+                        await send({'type': 'error', 'message': "no game in progress"})
+                        continue
+                    col = message.get('column')
+                    col = col - 1 if isinstance(col, int) else None
+                    if game.to_move != game.human or not game.legal(col):
+                        await send({'type': 'error', 'message': "illegal move"})
+                        continue
+                    game.play(col)
+                    await send(game.board_message())
+                    await self.agent_turn(game, send)
+                else:
+                    await send({'type': 'error', 'message': "unknown message type %r" % kind})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if game is not None and not game.over:
+                game.finish(game.agent, "disconnected")
+                await self.end_game(game, None)
+            writer.close()
+
+    async def new_game(self, message, send):
+        """Starts the game a 'new' message asks for, or answers with an error."""
+        spec = message.get('agent', next(iter(sorted(self.agents))))
+        rows, cols = message.get('rows', 6), message.get('cols', 7)
+        win_length = message.get('win_length', 4)
+        first = message.get('first', 'random')
+        if spec not in self.agents:
+            await send({'type': 'error', 'message': "unknown agent %r" % spec})
+            return None
+        if not all(isinstance(value, int) for value in (rows, cols, win_length)) or not (
+                1 <= rows <= MAX_ROWS and 1 <= cols <= MAX_COLS
+                and 3 <= win_length <= max(rows, cols)):
+            await send({'type': 'error', 'message': "bad board size or win length"})
+            return None
+        if first not in ('human', 'agent', 'random'):
+            await send({'type': 'error', 'message': "first must be human, agent or random"})
+            return None
+        worker = min(self.workers, key=lambda worker: len(worker.games))
+        if len(worker.games) >= self.games_per_worker:
+            await send({'type': 'error', 'message': "server full, try again later"})
+            return None
+        if first == 'random':
+            first = random.choice(('human', 'agent'))
+        human = 'X' if first == 'human' else 'O'
+        game = GameSession(next(self.game_ids), spec, rows, cols, win_length, human, worker)
+        worker.games.add(game.game_id)
+        try:
+            await worker.run(worker_start, game.game_id, spec, game.agent, rows, cols,
+                             [row[:] for row in game.board], win_length)
+        except Exception as error:
+            worker.games.discard(game.game_id)
+            await send({'type': 'error', 'message': "agent failed to start: %s" % error})
+            return None
+        self.games[game.game_id] = game
+        await send(game.board_message())
+        await self.agent_turn(game, send)
+        return game
+
+    async def agent_turn(self, game, send):
+        """Plays the agent's move if it is the agent's turn, then reports the board."""
+        if game.over or game.to_move != game.agent:
+            if game.over:
+                await self.end_game(game, send)
+            return
+        try:
+            setup = (game.spec, game.agent, game.rows, game.cols, game.win_length)
+            col = await game.worker.run(worker_move, game.game_id,
+                                        [row[:] for row in game.board], self.move_deadline,
+                                        setup, timeout=self.move_deadline) - 1
+        except asyncio.TimeoutError:
+            game.finish(game.human, "agent move deadline")
+        except Exception:
+            game.finish(game.human, "agent error")
+        else:
+            if game.legal(col):
+                game.play(col)
+                await send(game.board_message())
+            else:
+                game.finish(game.human, "agent illegal move")
+        if game.over:
+            await self.end_game(game, send)
+
+    async def end_game(self, game, send):
+        """Reports a finished game and frees its agent state in the worker."""
+        self.games.pop(game.game_id, None)
+        game.worker.games.discard(game.game_id)
+        if send is not None:
+            await send(game.over_message())
+        ending = asyncio.ensure_future(self.end_agent(game.worker, game.game_id))
+        self.endings.add(ending)
+        ending.add_done_callback(self.endings.discard)
+
+    async def end_agent(self, worker, game_id):
+        """Frees the agent state of a finished game once the worker gets to it."""
+        try:
+            await worker.run(worker_end, game_id, timeout=self.move_deadline)
+        except Exception:
+            pass
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+
+
+async def serve(server, host=None, port=None, unix_path=None):
+    """Runs server on a Unix socket at unix_path, or on host:port, until cancelled."""
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle, path=unix_path)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Connect 4 games against agents.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4000)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead")
+    parser.add_argument('--agents', nargs='+', default=list(DEFAULT_AGENTS),
+                        help="module names or .py files of the agents clients may play")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--games-per-worker', type=int, default=4,
+                        help="games a worker process takes at most")
+    parser.add_argument('--move-deadline', type=float, default=5.0,
+                        help="seconds an agent has for a move")
+    parser.add_argument('--human-deadline', type=float, default=300.0,
+                        help="seconds a human has for a move")
+    parser.add_argument('--move-time', type=float,
+                        help="sets MOVE_TIME_LIMIT of agents that have one")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help="sets a module-level setting of the agents")
+    args = parser.parse_args(argv)
+
+    settings = dict(parse_setting(text) for text in args.set)
+    if args.move_time is not None:
+        settings['MOVE_TIME_LIMIT'] = args.move_time
+    server = MatchServer(args.agents, args.workers, args.move_deadline, args.human_deadline,
+                         settings, args.games_per_worker)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#! /usr/bin/connect_4_tournament.py
+
+"""
+Headless Connect 4 tournament between two agent modules.
+
+Plays many games between agent A and agent B across a process pool, with the
+printing of the agents suppressed, a random first mover and a random opening
+for every game, on one or more board sizes, and reports A's wins, draws and
+losses with a confidence interval on its score.
+
+    python connect_4_tournament.py Team1_Connect_4_Agent Team2_Connect_4_Agent \
+        --games 2000 --rows 6 7 --cols 7 8 --workers 8 --move-time 0.1
+
+Agents are given by module name (as the game manager imports them) or by the
+path of a .py file, so two versions of the same agent can be compared.
+"""
+
+# IMPORTS
+import argparse
+import concurrent.futures
+import contextlib
+import importlib
+import importlib.util
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+import zlib
+
+from connect_4_records import GameRecordWriter
+
+# HELPER FUNCTIONS
+# Agent modules already imported by this process, keyed by their specification
+_agents = {}
+
+
+def load_agent(spec):
+    """
+    Description: Imports an agent given by module name or by the path of a .py file,
+    with anything it prints while importing thrown away. A file is imported under its
+    own name followed by a hash of its path, so two copies of an agent with the same
+    file name can play each other.
+    """
+    if spec not in _agents:
+        with quiet():
+            if spec.endswith('.py'):
+                path = os.path.abspath(spec)
+                name = '%s_%x' % (os.path.splitext(os.path.basename(path))[0],
+                                  zlib.crc32(path.encode()))
+                module_spec = importlib.util.spec_from_file_location(name, path)
+                module = importlib.util.module_from_spec(module_spec)
+                sys.modules[name] = module
+                module_spec.loader.exec_module(module)
+            else:
+                module = importlib.import_module(spec)
+        _agents[spec] = module
+    return _agents[spec]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Throws away everything printed inside a with block, such as the boards agents print."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def other(symbol):
+    return 'O' if symbol == 'X' else 'X'
+
+
+def configure_agent(module, settings):
+    """Sets module-level settings (such as MOVE_TIME_LIMIT) the agent defines."""
+    for name, value in settings.items():
+        if hasattr(module, name):
+            setattr(module, name, value)
+
+
+def drop_piece(board, col, symbol):
+    """Drops symbol into 0-based col and returns the row it landed in."""
+    for row in reversed(range(len(board))):
+        if board[row][col] == ' ':
+            board[row][col] = symbol
+            return row
+    raise ValueError("column %d is full" % (col + 1))
+
+
+def check_win(board, symbol, win_length=4):
+    """Checks the whole board for win_length pieces of symbol in a row."""
+    rows, cols = len(board), len(board[0])
+    for row in range(rows):
+        for col in range(cols):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+                end_row, end_col = row + (win_length - 1) * d_row, col + (win_length - 1) * d_col
+                if not (0 <= end_row < rows and end_col < cols):
+                    continue
+                if all(board[row + k * d_row][col + k * d_col] == symbol
+                       for k in range(win_length)):
+                    return True
+    return False
+
+
+"""
+Game Loop here
+"""
+def play_game(first, second, rows, cols, opening_plies=0, seed=None, names=None, win_length=4,
+              recorder=None, time_limit=None):
+    """
+    Description: Plays one game the way the game manager does: init_agent for both
+    agents, then what_is_your_move in turn until a win or a full board, then
+    connect_4_result for both. first plays 'X' and moves first, second plays 'O'.
+    The first opening_plies moves are random legal moves instead of agent moves. An
+    agent that returns an illegal column, or takes longer than time_limit seconds
+    (when given) over a move, loses the game by forfeit. An exception raised by an
+    agent is a bug rather than a move and is passed on. win_length pieces in a row win. When a GameRecordWriter is given as recorder, the game is appended
+    to it.
+    Returns (winner, moves, forfeit) where winner is 0 for first, 1 for second or
+    None for a draw, and moves lists the 0-based columns played.
+    """
+    generator = random.Random(seed)
+    random.seed(seed)
+    agents = (first, second)
+    symbols = ('X', 'O')
+    if names is None:
+        names = (first.__name__, second.__name__)
+    board = [[' '] * cols for _ in range(rows)]
+    for agent, symbol in zip(agents, symbols):
+        agent.init_agent(symbol, rows, cols, [row[:] for row in board])
+
+    winner, forfeit, moves = None, False, []
+    for ply in range(rows * cols):
+        turn = ply % 2
+        if ply < opening_plies:
+            col = generator.choice([col for col in range(cols) if board[0][col] == ' '])
+        else:
+            start = time.perf_counter()
+            col = agents[turn].what_is_your_move([row[:] for row in board], rows, cols,
+                                                 symbols[turn])
+            late = time_limit is not None and time.perf_counter() - start > time_limit
+            if isinstance(col, int):
+                col -= 1
+            if late or not (isinstance(col, int) and 0 <= col < cols and board[0][col] == ' '):
+                winner, forfeit = 1 - turn, True
+                break
+        drop_piece(board, col, symbols[turn])
+        moves.append(col)
+        if check_win(board, symbols[turn], win_length):
+            winner = turn
+            break
+
+    for agent in agents:
+        if winner is None:
+            agent.connect_4_result(board, 'Draw', 'Draw')
+        else:
+            agent.connect_4_result(board, names[winner], names[1 - winner])
+    if recorder is not None:
+        recorder.write_game(rows, cols, names, seed, moves, winner, forfeit, win_length)
+    return winner, moves, forfeit
+
+
+def play_match_game(task):
+    """
+    Description: Runs in a tournament worker process. Plays the game described by task
+    between agents A and B with all printing suppressed, and returns A's result as
+    'win', 'draw' or 'loss' along with the game details.
+    """
+    agent_a, agent_b = load_agent(task['agent_a']), load_agent(task['agent_b'])
+    for agent in (agent_a, agent_b):
+        configure_agent(agent, task['settings'])
+    if task['a_first']:
+        players, names = (agent_a, agent_b), ('A', 'B')
+    else:
+        players, names = (agent_b, agent_a), ('B', 'A')
+    start = time.perf_counter()
+    with quiet():
+        winner, moves, forfeit = play_game(players[0], players[1], task['rows'], task['cols'],
+                                           task['opening_plies'], task['seed'], names,
+                                           task['settings'].get('WIN_LENGTH', 4),
+                                           time_limit=task['time_limit'])
+    if winner is None:
+        outcome = 'draw'
+    else:
+        outcome = 'win' if names[winner] == 'A' else 'loss'
+    return {'rows': task['rows'], 'cols': task['cols'], 'a_first': task['a_first'],
+            'seed': task['seed'], 'outcome': outcome, 'forfeit': forfeit, 'moves': moves,
+            'seconds': time.perf_counter() - start}
+
+
+"""
+Statistics here
+"""
+def summarize(results, z=1.96):
+    """
+    Description: Totals A's wins, draws and losses and its score (a win counts 1 and
+    a draw 1/2) with a normal-approximation confidence interval (z = 1.96 for 95%),
+    and converts the score and its interval to an Elo difference.
+    """
+    counts = {'win': 0, 'draw': 0, 'loss': 0}
+    for result in results:
+        counts[result['outcome']] += 1
+    games = len(results)
+    summary = dict(counts, games=games, forfeits=sum(result['forfeit'] for result in results))
+    if not games:
+        return summary
+    score = (counts['win'] + 0.5 * counts['draw']) / games
+    variance = (counts['win'] + 0.25 * counts['draw']) / games - score ** 2
+    margin = z * math.sqrt(max(variance, 0.0) / games)
+    low, high = max(0.0, score - margin), min(1.0, score + margin)
+    summary.update(score=score, score_low=low, score_high=high,
+                   elo=elo_difference(score), elo_low=elo_difference(low),
+                   elo_high=elo_difference(high))
+    return summary
+
+
+def elo_difference(score):
+    """Elo rating difference that gives an expected score of score."""
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def print_summary(label, summary):
+    if not summary['games']:
+        print("%-10s no games" % label)
+        return
+    print("%-10s %6d games  W %6d  D %6d  L %6d  score %.3f [%.3f, %.3f]  Elo %+.0f [%+.0f, %+.0f]"
+          % (label, summary['games'], summary['win'], summary['draw'], summary['loss'],
+             summary['score'], summary['score_low'], summary['score_high'],
+             summary['elo'], summary['elo_low'], summary['elo_high']))
+
+
+"""
+Tournament here
+"""
+def make_tasks(agent_a, agent_b, games, sizes, opening_plies, settings, seed, time_limit=None):
+    """Describes every game: board sizes take turns, and each game gets its own seed
+    and a random first mover."""
+    generator = random.Random(seed)
+    tasks = []
+    for game, (rows, cols) in zip(range(games), itertools.cycle(sizes)):
+        tasks.append({'agent_a': agent_a, 'agent_b': agent_b, 'rows': rows, 'cols': cols,
+                      'a_first': generator.random() < 0.5,
+                      'seed': generator.getrandbits(32), 'opening_plies': opening_plies,
+                      'settings': settings, 'time_limit': time_limit})
+    return tasks
+
+
+def run_tournament(tasks, workers=None):
+    """Plays every task across a process pool and returns the results in task order."""
+    if workers == 1:
+        return [play_match_game(task) for task in tasks]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))
+        return list(pool.map(play_match_game, tasks, chunksize=chunksize))
+
+
+def record_games(path, results, agent_a, agent_b, win_length=4):
+    """Appends the games of a tournament to a game record file. The games are played
+    in the workers, so their records are written here as the results come back."""
+    with GameRecordWriter(path) as writer:
+        for result in results:
+            players = (agent_a, agent_b) if result['a_first'] else (agent_b, agent_a)
+            if result['outcome'] == 'draw':
+                winner = None
+            else:
+                winner = 0 if (result['outcome'] == 'win') == result['a_first'] else 1
+            writer.write_game(result['rows'], result['cols'], players, result['seed'],
+                              result['moves'], winner, result['forfeit'], win_length)
+
+
+def parse_setting(text):
+    """Parses NAME=VALUE, reading VALUE as JSON when it is valid JSON."""
+    name, _, value = text.partition('=')
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a Connect 4 tournament between two agents.")
+    parser.add_argument('agent_a', help="module name or .py file of agent A")
+    parser.add_argument('agent_b', help="module name or .py file of agent B")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--rows', type=int, nargs='+', default=[6])
+    parser.add_argument('--cols', type=int, nargs='+', default=[7],
+                        help="every combination of --rows and --cols is played")
+    parser.add_argument('--opening-plies', type=int, default=2,
+                        help="random moves played before the agents take over")
+    parser.add_argument('--move-time', type=float,
+                        help="sets MOVE_TIME_LIMIT of agents that have one")
+    parser.add_argument('--time-limit', type=float,
+                        help="seconds a move may take before the agent forfeits the game")
+    parser.add_argument('--win-length', type=int,
+                        help="pieces in a row that win, also sets WIN_LENGTH of agents that have one")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help="sets a module-level setting of both agents")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the summary and every game to this file")
+    parser.add_argument('--record', metavar='PATH',
+                        help="append every game to this binary game record file")
+    args = parser.parse_args(argv)
+
+    settings = dict(parse_setting(text) for text in args.set)
+    if args.move_time is not None:
+        settings['MOVE_TIME_LIMIT'] = args.move_time
+    if args.win_length is not None:
+        settings['WIN_LENGTH'] = args.win_length
+    sizes = list(itertools.product(args.rows, args.cols))
+    tasks = make_tasks(args.agent_a, args.agent_b, args.games, sizes, args.opening_plies,
+                       settings, args.seed, args.time_limit)
+    start = time.perf_counter()
+    results = run_tournament(tasks, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print("A = %s, B = %s, %d games in %.1f s" % (args.agent_a, args.agent_b, len(results), elapsed))
+    by_size = {}
+    for size in sizes:
+        by_size['%dx%d' % size] = summarize([result for result in results
+                                            if (result['rows'], result['cols']) == size])
+        print_summary('%dx%d' % size, by_size['%dx%d' % size])
+    total = summarize(results)
+    if len(sizes) > 1:
+        print_summary('total', total)
+
+    if args.record:
+        record_games(args.record, results, args.agent_a, args.agent_b,
+                     settings.get('WIN_LENGTH', 4))
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'agent_a': args.agent_a, 'agent_b': args.agent_b, 'settings': settings,
+                       'seed': args.seed, 'total': total, 'by_size': by_size,
+                       'games': results}, file)
+    return total
+
+
+if __name__ == "__main__":
+    main()